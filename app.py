@@ -1,25 +1,75 @@
+import time
+_T_IMPORT0 = time.perf_counter()
 import tkinter as tk
 from tkinter import ttk, messagebox
-import time
 import sys
 import os
-import json
 import datetime as dt
 import webbrowser
-from PIL import Image, ImageTk  # Pillow for image handling
-
-# Matplotlib for heatmap embed
-import matplotlib
-matplotlib.use("Agg")  # draw offscreen; we'll embed via FigureCanvasTkAgg
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import numpy as np
+
 import threading
+import multiprocessing
 import random
-try:
-    import pygame
-except Exception:
-    pygame = None
+import math
+import argparse
+from contextlib import contextmanager
+
+from effects import Beeper, EffectDispatcher
+from engine import PomodoroEngine
+from instrument import PERF, PerfPanel, install_tk_hooks
+from music_library import MusicLibrary
+from progress_bar import PhaseProgress
+from sessions_db import SessionDB
+from status_server import StatusServer, default_socket_path
+from storage import DataStore, StoreLocked, chain_longest_streak, run_ending_year
+
+# Heavy optional libraries (Pillow, matplotlib/numpy, pygame) are imported
+# lazily so the Timer tab can appear before they load.
+pygame = None
+
+
+def _load_pygame():
+    global pygame
+    if pygame is None:
+        import pygame as _pygame
+        pygame = _pygame
+    return pygame
+
+
+class StartupProfile:
+    """Per-phase startup timings, printed when run with --profile-startup."""
+
+    def __init__(self):
+        self.enabled = False
+        self.reported = False
+        self.phases = []
+
+    def add(self, name: str, secs: float):
+        if not self.enabled:
+            return
+        self.phases.append((name, secs))
+        if self.reported:
+            # Deferred phases (Stats tab, mixer) show up after the first frame
+            print(f"[Startup] +{name}: {secs * 1000:.1f} ms")
+
+    @contextmanager
+    def phase(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t)
+
+    def report(self, title: str, total: float):
+        if not self.enabled:
+            return
+        print(f"[Startup] {title}: {total * 1000:.1f} ms")
+        for name, secs in self.phases:
+            print(f"[Startup]   {name:<32} {secs * 1000:8.1f} ms")
+        self.reported = True
+
+
+PROFILE = StartupProfile()
 # --- Resource path helper ---
 def resource_path(rel_path: str) -> str:
     # Giúp lấy đúng đường dẫn asset khi chạy .py hoặc .exe (PyInstaller)
@@ -35,12 +85,27 @@ try:
 except Exception:
     _plyer_notify = None
 
+_T_IMPORTS_DONE = time.perf_counter()
+
 APP_NAME = "Pomodoro Timer"
 DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.json")
+SESSIONS_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions.db")
+MUSIC_INDEX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "music_index.json")
+
+# Stats tab views: label -> (title, heatmap.<class>)
+STATS_VIEWS = {
+    "Last 90 days": ("Study Heatmap (last 90 days)", "HeatmapView"),
+    "Hour x weekday": ("When you focus (all history)", "HourWeekdayView"),
+    "All years": ("Study Calendar (all years)", "CalendarView"),
+}
 
 # --- Sound helpers (Windows-first) ---
 def play_beep(root: tk.Tk):
-    """Beep at phase change. Uses winsound on Windows; safe fallbacks elsewhere."""
+    """Fallback beep when the mixer chime isn't available (see effects.Beeper).
+
+    winsound.Beep blocks for the whole tone, so on Windows this belongs on
+    the "sound" effects lane; root.bell() must stay on the Tk thread.
+    """
     try:
         if sys.platform.startswith("win"):
             import winsound
@@ -61,70 +126,211 @@ def notify(title: str, message: str):
         pass
 
 class MusicPlayer:
-    def __init__(self, folder: str, shuffle: bool = True, volume: float = 0.6):
+    BOUNDARY_EARLY = 0.05   # wake this long before the computed end of a track
+    BOUNDARY_POLL = 0.01    # then watch for the queued track taking over at this rate
+
+    def __init__(self, folder: str, shuffle: bool = True, volume: float = 0.6, index_path: str = None,
+                 normalize: bool = True):
         self.folder = folder
+        # Recursive track index, cached on disk and refreshed in the background
+        self.library = MusicLibrary(folder, index_path or MUSIC_INDEX)
+        self._index_loaded = False
+        self._fresh_tracks = None   # set by the library rescan, merged at the next track change
         self.shuffle = shuffle
         self.volume = max(0.0, min(1.0, float(volume)))
+        # Per-track volume from the cached loudness (measured in the background)
+        self.normalize = normalize
         self._stop = threading.Event()
         self._thread = None
         self._playlist = []
         self._i = 0
-        try:
-            if pygame is None:
-                raise RuntimeError("pygame not available")
-            pygame.mixer.init()
-            pygame.mixer.music.set_volume(self.volume)
-            self.available = True
-        except Exception as e:
-            print("[Music] Disabled:", e)
-            self.available = False
+        self._lengths = {}
+        # pygame is imported and the mixer started on the player thread
+        self.available = True
+        self._mixer_ready = False
+        self._mixer_lock = threading.Lock()
+
+    def init_mixer(self) -> bool:
+        with self._mixer_lock:
+            if self._mixer_ready or not self.available:
+                return self._mixer_ready
+            t = time.perf_counter()
+            try:
+                _load_pygame()
+                pygame.mixer.init()
+                pygame.mixer.music.set_volume(self.volume)
+                self._mixer_ready = True
+            except Exception as e:
+                print("[Music] Disabled:", e)
+                self.available = False
+            PROFILE.add("pygame + mixer init (background)", time.perf_counter() - t)
+            return self._mixer_ready
 
     def _load_playlist(self):
-        if not os.path.isdir(self.folder):
-            self._playlist = []
-            return
-        files = [os.path.join(self.folder, f) for f in os.listdir(self.folder) if f.lower().endswith(".mp3")]
-        files.sort()
+        # Cached index first (no directory listing); rescans update it later
+        if not self._index_loaded:
+            self.library.load_index()
+            self._index_loaded = True
+        files = self.library.tracks()
         if self.shuffle:
             random.shuffle(files)
         self._playlist = files
 
-    def _loop(self):
-        import time
+    def _on_library_scanned(self, changed: bool):
+        if changed:
+            self._fresh_tracks = self.library.tracks()
+        if self.normalize:
+            self.library.analyse_async()  # only new or changed files are decoded
+
+    def _apply_volume(self, track: str):
+        """Set the mixer volume for `track` from its cached loudness (if any)."""
+        vol = self.volume
+        if self.normalize:
+            res = self.library.loudness(track)
+            if res:
+                from loudness import volume_for
+                vol = volume_for(res, self.volume)
+        try:
+            pygame.mixer.music.set_volume(vol)
+        except Exception:
+            pass
+
+    def _merge_fresh_tracks(self):
+        """Fold a finished rescan into the playlist without restarting it."""
+        fresh, self._fresh_tracks = self._fresh_tracks, None
+        if not fresh:
+            return
+        fresh_set = set(fresh)
+        current = self._playlist[self._i] if self._playlist else None
+        known = set(self._playlist)
+        keep = [p for p in self._playlist if p in fresh_set]
+        added = [p for p in fresh if p not in known]
+        if self.shuffle:
+            random.shuffle(added)
+        pos = keep.index(current) + 1 if current in fresh_set else 0
+        self._playlist = keep[:pos] + added + keep[pos:]
+        self._i = pos - 1
+
+    def _track_length(self, path: str):
+        """Track length in seconds (from the library index, else decoded once per file version), or None."""
+        if path in self._lengths:
+            return self._lengths[path]
+        length = self.library.duration(path)
+        if length is None:
+            try:
+                length = pygame.mixer.Sound(path).get_length()
+            except Exception:
+                length = None
+            else:
+                self.library.set_duration(path, round(length, 3))
+        self._lengths[path] = length
+        return length
+
+    def _advance(self):
+        if self._fresh_tracks is not None:
+            self._merge_fresh_tracks()
+        self._i += 1
+        if self._i >= len(self._playlist):
+            if self.shuffle:
+                random.shuffle(self._playlist)
+            self._i = 0
+        return self._playlist[self._i]
+
+    def _play_now(self, track: str) -> bool:
+        try:
+            pygame.mixer.music.load(track)
+            self._apply_volume(track)
+            pygame.mixer.music.play()
+            print("[Music] Playing:", os.path.basename(track))
+            return True
+        except Exception as e:
+            print("[Music] Play error:", e)
+            return False
+
+    def _play_from(self, track: str, stop: threading.Event):
+        """Play `track`, or else the next playable one; None once all have failed."""
+        for _ in range(max(1, len(self._playlist))):
+            if stop.is_set():
+                return None
+            if self._play_now(track):
+                return track
+            track = self._advance()  # e.g. deleted since the index was written
+        if not stop.is_set():
+            print("[Music] No playable tracks; music stopped.")
+        return None
+
+    def _loop(self, stop: threading.Event):
+        # The next track is always queued in the mixer so transitions are
+        # gapless. The thread sleeps on `stop` until the current track is
+        # due to end, so there are no periodic wakeups while music plays.
+        if not self.init_mixer():
+            return
         self._load_playlist()
+        if not self.library.scanned.is_set():
+            self.library.rescan_async(self._on_library_scanned)
         if not self._playlist:
-            print(f"[Music] No .mp3 found in '{self.folder}'.")
+            # First run (no index yet): wait for the scan to finish
+            while not self.library.scanned.wait(0.25):
+                if stop.is_set():
+                    return
+            self._fresh_tracks = None
+            self._load_playlist()
+        if not self._playlist:
+            print(f"[Music] No audio files found in '{self.folder}'.")
             return
         self._i = 0
-        while not self._stop.is_set():
-            track = self._playlist[self._i]
+        current = self._play_from(self._playlist[0], stop)
+        if current is None:
+            return
+        started = time.monotonic()
+        while not stop.is_set():
+            nxt = self._advance()
             try:
-                pygame.mixer.music.load(track)
-                pygame.mixer.music.play()
-                print("[Music] Playing:", os.path.basename(track))
+                pygame.mixer.music.queue(nxt)
             except Exception as e:
-                print("[Music] Play error:", e)
-            while not self._stop.is_set() and pygame.mixer.music.get_busy():
-                time.sleep(0.2)
-            self._i += 1
-            if self._i >= len(self._playlist):
-                if self.shuffle:
-                    random.shuffle(self._playlist)
-                self._i = 0
+                print("[Music] Queue error:", e)
+            length = self._track_length(current)
+            if length is None:
+                length = 5.0  # unknown length: re-check shortly
+            if stop.wait(max(0.0, started + length - self.BOUNDARY_EARLY - time.monotonic())):
+                break
+            # get_pos() restarts from 0 when the queued track takes over; catch
+            # that within BOUNDARY_POLL so its volume is set as it starts
+            while (not stop.is_set() and pygame.mixer.music.get_busy()
+                   and pygame.mixer.music.get_pos() / 1000.0 > time.monotonic() - started - length / 2):
+                stop.wait(self.BOUNDARY_POLL)  # still on `current`; its end is moments away
+            if stop.is_set():
+                break
+            if pygame.mixer.music.get_busy():
+                started = time.monotonic() - pygame.mixer.music.get_pos() / 1000.0
+                self._apply_volume(nxt)  # the queued track took over at the previous level
+                print("[Music] Playing:", os.path.basename(nxt))
+                current = nxt
+            else:
+                current = self._play_from(nxt, stop)
+                if current is None:
+                    break
+                started = time.monotonic()
 
     def start(self):
         if not getattr(self, "available", False):
             return
-        if self._thread and self._thread.is_alive():
+        if self._thread and self._thread.is_alive() and not self._stop.is_set():
             return
-        self._stop.clear()
-        self._thread = threading.Thread(target=self._loop, daemon=True)
+        # A fresh event per run: a thread still winding down keeps the old one
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, args=(self._stop,), daemon=True)
         self._thread.start()
 
+    def close(self):
+        """Stop playback and any loudness analysis (app exit)."""
+        self.stop()
+        self.library.stop_analysis()
+
     def stop(self):
-        if not getattr(self, "available", False):
+        self._stop.set()  # wakes the player thread immediately
+        if not self._mixer_ready:
             return
-        self._stop.set()
         try:
             pygame.mixer.music.stop()
         except Exception:
@@ -140,8 +346,11 @@ class PomodoroApp:
         except Exception as e:
             print("[Music] toggle error:", e)
 
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, status_socket: str = None, slideshow: str = None,
+                 slideshow_cache_mb: float = 128):
         self.root = root
+        self._slideshow_dir = slideshow
+        self._slideshow_cache = int(slideshow_cache_mb * 1024 * 1024)
         # Set app icon for window & taskbar
         try:
             self.root.iconbitmap(resource_path("assets/app.ico"))  # ưu tiên .ico trên Windows
@@ -160,15 +369,24 @@ class PomodoroApp:
             "25 / 5": (25, 5),
         }
         self.mode_var = tk.StringVar(value="25 / 5")
-        self.phase = "focus"  # or "break"
-        self.running = False
-        self.start_ts = None          # monotonic seconds when (re)started
-        self.remaining_secs = self._phase_duration_secs()
-        self.completed_focus_sessions = 0  # in this runtime
+        # Phase/deadline state lives in the GUI-free engine; this class only
+        # schedules Tk wakeups and runs the side effects of phase changes.
+        focus_m, break_m = self.modes[self.mode_var.get()]
+        self.engine = PomodoroEngine(focus_m * 60, break_m * 60)
+        self._tick_id = None
+        self._time_text = None
+        self._refresh_parts = set()   # UI refreshes merged into one idle callback
+        self._refresh_id = None
+        self._stats_wait = None       # session DB flush a Stats redraw is waiting for
+        self._phase_wall_start = None  # wall-clock start of the current phase (session DB)
         self.sound_enabled = tk.BooleanVar(value=True)
 
+        # Disk writes and notifications run off the Tk thread (effects.py)
+        self.effects = EffectDispatcher()
+
         # Data & settings
-        self.data = self._load_data()
+        with PROFILE.phase("load data"):
+            self.data = self._load_data()
         self.playlist_var = tk.StringVar(value=self.data.get("settings", {}).get("playlist_url", ""))
         # --- Music (optional) ---
         self.music_enabled = tk.BooleanVar(value=True)
@@ -181,43 +399,90 @@ class PomodoroApp:
         except NameError:
             # Chưa thêm class MusicPlayer thì vẫn tạo biến để UI không lỗi
             self.music = None
-
-        # UI
-        self._build_ui()
+        # Phase-change chime; rendered in the background after the first frame
+        self.beeper = Beeper(self.music.init_mixer if self.music else None)
+
+        # Local push endpoint for status bars/dashboards (status_server.py)
+        self.status = None
+        if status_socket:
+            self.status = StatusServer(status_socket)
+            if not self.status.start():
+                self.status = None
+            self._publish_status("state")
+
+        # UI (the Stats tab is built on first use, see _ensure_stats_tab)
+        with PROFILE.phase("build timer UI"):
+            self._build_ui()
         self._update_labels()
-        self._update_clock()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        # Hidden performance panel (F12); see instrument.py
+        self.perf_panel = None
+        self.root.bind("<F12>", lambda e: self._toggle_perf_panel())
 
     # ----------------- Persistence -----------------
     def _load_data(self):
-        if not os.path.exists(DATA_FILE):
-            return {"days": {}, "settings": {}}
-        try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if not isinstance(data, dict):
-                raise ValueError("bad data.json structure")
-            data.setdefault("days", {})
-            data.setdefault("settings", {})
-            return data
-        except Exception:
-            return {"days": {}, "settings": {}}
-
-    def _save_data(self):
+        # Snapshot + append-only journal; see storage.DataStore
+        self.store = DataStore(DATA_FILE)
         try:
-            os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-            with open(DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
+            data = self.store.load()
+        except StoreLocked as e:
+            # Another instance or history_io import is writing the same journal
+            messagebox.showerror(APP_NAME, f"Data file is in use:\n{e}")
+            raise SystemExit(1)
+        # Per-phase rows for time-of-day stats; seeded once from the days map
+        self.sessions_db = SessionDB(SESSIONS_DB)
+        # Full history (archives included) is only read if the DB hasn't seen it
+        self.sessions_db.import_days_once(self.store.all_days)
+        return data
+
+    def _record_phase(self, mode: str, completed: bool):
+        """Log the current phase (finished or abandoned) to the session DB."""
+        if self._phase_wall_start is None:
+            return
+        planned = self.engine.phase_duration(mode)
+        actual = planned if completed else planned - self.engine.remaining_at()
+        self._phase_wall_start, start = None, self._phase_wall_start
+        if actual <= 0:
+            return
+        self.sessions_db.record(start, time.time(), mode, planned, actual, completed)
 
     def _log_focus_session(self, minutes: int):
         today = dt.date.today().isoformat()  # YYYY-MM-DD
-        dayrec = self.data.setdefault("days", {}).setdefault(today, {"focus_sessions": 0, "minutes": 0})
-        dayrec["focus_sessions"] += 1
-        dayrec["minutes"] += int(minutes)
-        self._save_data()
-        # Refresh stats tab counter immediately
-        self._render_heatmap(auto_size=False)
+        # Journal append + fsync on the store lane; the index is updated here
+        self.effects.submit("store", self.store.log_session, today, minutes, label="log session")
+        if self.stats is not None:
+            self.stats.add(today, sessions=1, minutes=int(minutes))
+        self._request_refresh("stats")
+
+    def _toggle_perf_panel(self):
+        if self.perf_panel is None:
+            self.perf_panel = PerfPanel(self.root)
+            self.perf_panel.show()
+        else:
+            self.perf_panel.toggle()
+
+    def _on_close(self):
+        if PERF.series:
+            path = os.path.join(os.path.dirname(DATA_FILE), time.strftime("perf-%Y%m%d-%H%M%S.json"))
+            try:
+                PERF.dump(path)
+                print("[Perf] Timings written to", path)
+            except OSError as e:
+                print("[Perf] dump failed:", e)
+        if self.status is not None:
+            self.status.close()
+        if self.slides is not None:
+            self.slides.close()
+        if self.music is not None:
+            self.music.close()
+        try:
+            self._record_phase(self.engine.phase, completed=False)
+            self.effects.shutdown()  # queued journal writes land before the store closes
+            self.sessions_db.close()
+            self.store.close()
+        except Exception as e:
+            print("[Data] close error:", e)
+        self.root.destroy()
 
     # ----------------- UI -----------------
     def _build_ui(self):
@@ -229,71 +494,32 @@ class PomodoroApp:
         self.stats_tab = ttk.Frame(self.nb)
         self.nb.add(self.timer_tab, text="Timer")
         self.nb.add(self.stats_tab, text="Stats")
-                # ==== ẢNH NỀN CHO TAB STATS ====
-        bg_file_stats = resource_path("assets/bg.jpg")  # có thể đổi ảnh khác cho Stats nếu muốn
-        try:
-            self._bg_stats_src = Image.open(bg_file_stats)
-        except Exception as e:
-            self._bg_stats_src = None
-            print("Không load được ảnh nền Stats:", e)
+        # ==== ẢNH NỀN (dùng chung cho cả hai tab) ====
+        # Decoded once; both tabs are served from the same scaled-image cache
+        self.bg = None
+        bg_file = resource_path("assets/bg.jpg")
+        if os.path.exists(bg_file):
+            with PROFILE.phase("Pillow import + bg decode"):
+                from background import load_background  # Pillow only when there is an image
+                self.bg = load_background(self.root, bg_file)
+        # Optional wallpaper rotation at phase changes (decoded off the Tk thread)
+        self.slides = None
+        if self._slideshow_dir:
+            if not os.path.isdir(self._slideshow_dir):
+                print("[Background] Slideshow folder not found:", self._slideshow_dir)
+            else:
+                from background import BackgroundImage, Slideshow
+                if self.bg is None:
+                    self.bg = BackgroundImage(self.root)
+                self.slides = Slideshow(self.bg, self._slideshow_dir, cache_bytes=self._slideshow_cache)
 
         self._bg_stats_label = tk.Label(self.stats_tab, bd=0, highlightthickness=0)
         self._bg_stats_label.place(relx=0, rely=0, relwidth=1, relheight=1)
-
-        def _img_cover_stats(img, target_size):
-            tw, th = target_size
-            iw, ih = img.size
-            scale = max(tw / iw, th / ih)
-            nw, nh = int(iw * scale), int(ih * scale)
-            resized = img.resize((nw, nh), Image.LANCZOS)
-            left = max((nw - tw) // 2, 0)
-            top = max((nh - th) // 2, 0)
-            return resized.crop((left, top, left + tw, top + th))
-
-        def _redraw_bg_stats(event=None):
-            if not self._bg_stats_src:
-                return
-            w, h = self.stats_tab.winfo_width(), self.stats_tab.winfo_height()
-            if w < 2 or h < 2:
-                return
-            img = _img_cover_stats(self._bg_stats_src, (w, h))
-            self._bg_stats_photo = ImageTk.PhotoImage(img)
-            self._bg_stats_label.config(image=self._bg_stats_photo)
-
-        self.stats_tab.bind("<Configure>", _redraw_bg_stats)
-
-        # ==== ẢNH NỀN CHO TAB TIMER ====
-        bg_file = resource_path("assets/bg.jpg")  # đổi theo tên ảnh của cậu
-        try:
-            self._bg_src = Image.open(bg_file)
-        except Exception as e:
-            self._bg_src = None
-            print("Không load được ảnh nền:", e)
-
         self._bg_label = tk.Label(self.timer_tab, bd=0, highlightthickness=0)
         self._bg_label.place(relx=0, rely=0, relwidth=1, relheight=1)
-
-        def _img_cover(img, target_size):
-            tw, th = target_size
-            iw, ih = img.size
-            scale = max(tw / iw, th / ih)
-            nw, nh = int(iw * scale), int(ih * scale)
-            resized = img.resize((nw, nh), Image.LANCZOS)
-            left = max((nw - tw) // 2, 0)
-            top = max((nh - th) // 2, 0)
-            return resized.crop((left, top, left + tw, top + th))
-
-        def _redraw_bg(event=None):
-            if not self._bg_src:
-                return
-            w, h = self.timer_tab.winfo_width(), self.timer_tab.winfo_height()
-            if w < 2 or h < 2:
-                return
-            img = _img_cover(self._bg_src, (w, h))
-            self._bg_photo = ImageTk.PhotoImage(img)
-            self._bg_label.config(image=self._bg_photo)
-
-        self.timer_tab.bind("<Configure>", _redraw_bg)
+        if self.bg:
+            self.bg.attach(self.stats_tab, self._bg_stats_label)
+            self.bg.attach(self.timer_tab, self._bg_label)
 
         # Khung nội dung đè lên nền
         self.timer_content = ttk.Frame(self.timer_tab, padding=12)
@@ -324,6 +550,10 @@ class PomodoroApp:
         self.time_label = ttk.Label(outer, text="25:00", font=("Segoe UI", 46, "bold"))
         self.time_label.pack(pady=(0, 8))
 
+        # Phase progress; redraws only when the fill moves a pixel (progress_bar.py)
+        self.progress = PhaseProgress(outer, self.engine)
+        self.progress.pack(fill="x", pady=(0, 8))
+
         # Next up label
         self.next_label = ttk.Label(outer, text="Next: Break 5 min", font=("Segoe UI", 10))
         self.next_label.pack(pady=(0, 10))
@@ -358,6 +588,30 @@ class PomodoroApp:
         ttk.Button(pl_frame, text="Open in Browser", command=self._open_playlist).grid(row=0, column=2, padx=6, pady=6)
         ttk.Button(pl_frame, text="Save", command=self._save_playlist_setting).grid(row=0, column=3, padx=6, pady=6)
 
+        self._stats_built = False
+        self.heatmap = None
+        self._heatmap_kind = None
+        self.stats = None
+        self.stats_view_var = tk.StringVar(value=next(iter(STATS_VIEWS)))
+        self.nb.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+        # Style
+        style = ttk.Style(self.root)
+        try:
+            style.theme_use("clam")
+        except tk.TclError:
+            pass
+
+    def _on_tab_changed(self, event=None):
+        if self.nb.select() == str(self.stats_tab):
+            self._ensure_stats_tab()
+
+    def _ensure_stats_tab(self):
+        if self._stats_built:
+            return
+        self._stats_built = True
+        t = time.perf_counter()
+
         # --- Stats tab layout ---
         self.stats_content = ttk.Frame(self.stats_tab, padding=8)
         self.stats_content.place(relx=0.5, rely=0.5, anchor="center")
@@ -369,25 +623,37 @@ class PomodoroApp:
 
         top_row = ttk.Frame(stats_outer)
         top_row.pack(fill="x")
-        ttk.Label(top_row, text="Study Heatmap (last 90 days)", font=("Segoe UI", 11, "bold")).pack(side="left")
+        self.stats_title = ttk.Label(top_row, text="Study Heatmap (last 90 days)", font=("Segoe UI", 11, "bold"))
+        self.stats_title.pack(side="left")
         ttk.Button(top_row, text="Refresh", command=self._render_heatmap).pack(side="right")
+        view_box = ttk.Combobox(top_row, textvariable=self.stats_view_var, values=list(STATS_VIEWS),
+                                state="readonly", width=16)
+        view_box.pack(side="right", padx=6)
+        view_box.bind("<<ComboboxSelected>>", lambda e: self._render_heatmap())
 
         self.heatmap_area = ttk.Frame(stats_outer)
         self.heatmap_area.pack(fill="both", expand=True, pady=(6, 0))
+        self.summary_label = ttk.Label(stats_outer, text="", font=("Segoe UI", 9))
+        self.summary_label.pack(fill="x", pady=(6, 0))
         self._render_heatmap()
+        PROFILE.add("build Stats tab (first open)", time.perf_counter() - t)
 
-        # Style
-        style = ttk.Style(self.root)
-        try:
-            style.theme_use("clam")
-        except tk.TclError:
-            pass
+    def _prewarm_stats_imports(self):
+        """Import matplotlib/numpy off the Tk thread once the window is up."""
+        def _work():
+            t = time.perf_counter()
+            try:
+                import heatmap  # noqa: F401  (pulls in matplotlib)
+                import stats_index  # noqa: F401  (pulls in numpy)
+            except Exception as e:
+                print("[Stats] preload failed:", e)
+            PROFILE.add("matplotlib/numpy import (background)", time.perf_counter() - t)
+        threading.Thread(target=_work, daemon=True).start()
 
     # ----------------- Playlist helpers -----------------
     def _save_playlist_setting(self):
         url = self.playlist_var.get().strip()
-        self.data.setdefault("settings", {})["playlist_url"] = url
-        self._save_data()
+        self.effects.submit("store", self.store.set_setting, "playlist_url", url, label="save setting")
         messagebox.showinfo(APP_NAME, "Saved playlist URL.")
 
     def _open_playlist(self):
@@ -401,139 +667,228 @@ class PomodoroApp:
             messagebox.showerror(APP_NAME, f"Failed to open URL: {e}")
 
     # ----------------- Timer logic -----------------
-    def _phase_duration_secs(self):
-        focus_m, break_m = self.modes[self.mode_var.get()]
-        return (focus_m * 60) if self.phase == "focus" else (break_m * 60)
-
     def _on_change_mode(self):
-        if not self.running:
-            self.remaining_secs = self._phase_duration_secs()
+        focus_m, break_m = self.modes[self.mode_var.get()]
+        if not self.engine.running:
+            self._record_phase(self.engine.phase, completed=False)  # paused progress is dropped
+        self.engine.set_durations(focus_m * 60, break_m * 60)
+        if not self.engine.running:
             self._update_labels()
+            self._publish_status("state")
+        else:
+            self.progress.restart()  # same deadline, new phase length
 
     def start(self):
-        if self.running:
+        if self.engine.running:
             return
-        self.running = True
-        self.start_ts = time.monotonic()
+        if self._phase_wall_start is None:
+            self._phase_wall_start = time.time()
+        self.engine.start()
         self.start_btn.config(state="disabled")
         self.pause_btn.config(state="normal")
+        self._publish_status("state")
         self._tick()
+        self.progress.start()
 
     def pause(self):
-        if not self.running:
+        if not self.engine.running:
             return
-        self.running = False
-        now = time.monotonic()
-        dt_elapsed = now - (self.start_ts or now)
-        self.remaining_secs = max(0, int(round(self.remaining_secs - dt_elapsed)))
+        self.engine.pause()
+        self._cancel_tick()
+        self.progress.stop()
         self.start_btn.config(state="normal")
         self.pause_btn.config(state="disabled")
+        self._update_labels()
+        self._publish_status("state")
 
     def reset(self):
-        self.running = False
-        self.phase = "focus"
-        self.remaining_secs = self._phase_duration_secs()
+        self._cancel_tick()
+        self.progress.stop()
+        self._record_phase(self.engine.phase, completed=False)
+        self.engine.reset()
         self.start_btn.config(state="normal")
         self.pause_btn.config(state="disabled")
         self._update_labels()
+        self._publish_status("state")
+
+    def _cancel_tick(self):
+        if self._tick_id is not None:
+            self.root.after_cancel(self._tick_id)
+            self._tick_id = None
 
     def _tick(self):
-        if not self.running:
+        # Runs only while running, once per displayed-second change: each
+        # call schedules itself for the next whole-second boundary of the
+        # engine's monotonic deadline (or the phase end), so nothing drifts.
+        self._tick_id = None
+        change = self.engine.poll()
+        if change is not None:
+            self._on_phase_end(change)
             return
-        now = time.monotonic()
-        dt_elapsed = now - (self.start_ts or now)
-        secs_left = int(round(self.remaining_secs - dt_elapsed))
-        if secs_left <= 0:
-            # Phase finished
-            self.running = False
-            self.start_btn.config(state="normal")
-            self.pause_btn.config(state="disabled")
-
-            if self.sound_enabled.get():
-                play_beep(self.root)
-
-            if self.phase == "focus":
-                self.completed_focus_sessions += 1
-                focus_m, _ = self.modes[self.mode_var.get()]
+        if not self.engine.running:
+            return
+        left = self.engine.remaining_at()
+        shown = math.ceil(left)
+        self._set_time_text(self._format_secs(shown))
+        self._publish_status("tick", remaining=left)
+        # Wake just after the display would change to shown - 1
+        delay_ms = int((left - (shown - 1)) * 1000) + 1
+        self._tick_id = self.root.after(delay_ms, self._tick)
+
+    def _on_phase_end(self, change):
+        # The next phase starts right away, chained from the old deadline so
+        # nothing drifts; everything else is only queued (effects lanes, one
+        # idle UI refresh) and can't delay it.
+        with PERF.span("phase: record session"):
+            self._record_phase(change.ended, completed=True)
+        with PERF.span("phase: start next"):
+            self._phase_wall_start = time.time() - max(0.0, self.engine.clock() - change.at)
+            self.engine.start(now=change.at)
+            self._publish_status("phase", ended=change.ended)
+            self._tick()
+            self.progress.restart()
+
+        if self.sound_enabled.get():
+            with PERF.span("phase: beep"):
+                self._beep()
+
+        focus_m, break_m = self.modes[self.mode_var.get()]
+        if change.ended == "focus":
+            with PERF.span("phase: log focus session"):
                 self._log_focus_session(minutes=focus_m)
-                self.phase = "break"
-                notify("Focus done!", f"Great job. Time for a {self.modes[self.mode_var.get()][1]}-min break.")
-            else:
-                self.phase = "focus"
-                notify("Break over", f"Back to focus: {self.modes[self.mode_var.get()][0]} minutes.")
+            self.effects.submit("notify", notify, "Focus done!", f"Great job. Time for a {break_m}-min break.")
+        else:
+            self.effects.submit("notify", notify, "Break over", f"Back to focus: {focus_m} minutes.")
+        if self.slides is not None:
+            self.slides.advance()
+        self._request_refresh("labels")
 
-            self.remaining_secs = self._phase_duration_secs()
-            self._update_labels()
-            self.root.after(500, self.start)  # auto-start next phase after short gap
+    def _publish_status(self, event: str, remaining: float = None, **extra):
+        if self.status is None:
+            return
+        eng = self.engine
+        if remaining is None:
+            remaining = eng.remaining_at()
+        now = time.time()
+        msg = {"event": event, "phase": eng.phase, "running": eng.running, "remaining": round(remaining, 3),
+               "deadline": round(now + remaining, 3) if eng.running else None,
+               "completed_focus": eng.completed_focus, "focus_secs": eng.focus_secs,
+               "break_secs": eng.break_secs, "ts": round(now, 3)}
+        msg.update(extra)
+        self.status.publish(msg)
+
+    def _beep(self):
+        if self.beeper.play():
             return
+        if sys.platform.startswith("win"):
+            self.effects.submit("sound", play_beep, self.root)
         else:
-            # Keep ticking
-            self.time_label.config(text=self._format_secs(secs_left))
-            self.root.after(200, self._tick)
+            play_beep(self.root)
+
+    def _request_refresh(self, *parts):
+        """Merge UI refreshes requested in one event-loop pass into one idle callback."""
+        self._refresh_parts.update(parts)
+        if self._refresh_id is None:
+            self._refresh_id = self.root.after_idle(self._flush_refresh)
+
+    def _flush_refresh(self):
+        self._refresh_id = None
+        parts, self._refresh_parts = self._refresh_parts, set()
+        if "labels" in parts:
+            self._update_labels()
+        if "stats" in parts:
+            self._render_heatmap(auto_size=False)
+
+    def _set_time_text(self, text: str):
+        if text != self._time_text:
+            self._time_text = text
+            self.time_label.config(text=text)
 
     def _update_labels(self):
-        self.phase_label.config(text="Focus" if self.phase == "focus" else "Break")
-        self.time_label.config(text=self._format_secs(self.remaining_secs))
+        phase = self.engine.phase
+        self.phase_label.config(text="Focus" if phase == "focus" else "Break")
+        self._set_time_text(self._format_secs(math.ceil(self.engine.remaining_at())))
+        self.progress.refresh()
         focus_m, break_m = self.modes[self.mode_var.get()]
-        if self.phase == "focus":
+        if phase == "focus":
             self.next_label.config(text=f"Next: Break {break_m} min")
         else:
             self.next_label.config(text=f"Next: Focus {focus_m} min")
-        self.counter_label.config(text=f"Focus sessions (runtime): {self.completed_focus_sessions}")
-
-    def _update_clock(self):
-        if not self.running:
-            self.time_label.config(text=self._format_secs(self.remaining_secs))
-        self.root.after(500, self._update_clock)
+        self.counter_label.config(text=f"Focus sessions (runtime): {self.engine.completed_focus}")
 
     # ----------------- Heatmap -----------------
+    def _stats_index(self):
+        # Built on first use (needs numpy) from the years the heatmap reaches,
+        # then kept current by _log_focus_session. Older years stay archived.
+        if self.stats is None:
+            from heatmap import WINDOW_DAYS
+            from stats_index import StatsIndex
+            self.effects.flush("store")  # include journal writes still queued
+            today = dt.date.today()
+            self._stats_from = dt.date((today - dt.timedelta(days=WINDOW_DAYS - 1)).year, 1, 1)
+            self.stats = StatsIndex.from_days(self.store.days_between(self._stats_from, today))
+        return self.stats
+
     def _render_heatmap(self, auto_size=True):
-        # Clear previous canvas
-        for w in self.heatmap_area.winfo_children():
-            w.destroy()
+        if not self._stats_built:
+            return  # drawn with fresh data when the Stats tab is first opened
+        # Figure/canvas persist in the view; only the image data changes
+        kind = self.stats_view_var.get()
+        if self.heatmap is None or self._heatmap_kind != kind:
+            import heatmap
+            if self.heatmap is not None:
+                self.heatmap.destroy()
+            title, cls_name = STATS_VIEWS[kind]
+            self.heatmap = getattr(heatmap, cls_name)(self.heatmap_area)
+            self._heatmap_kind = kind
+            self.stats_title.config(text=title)
+        stats = self._stats_index()
+        if kind == "Last 90 days":
+            self.heatmap.update(stats)
+        else:
+            # Include phases still queued for the writer, but don't stall the Tk
+            # thread on it (e.g. behind the first-run history import): draw what
+            # is committed now and redraw once the writer has caught up.
+            done = self.sessions_db.request_flush()
+            if not done.wait(0.2):
+                self._redraw_stats_when(done)
+            self.heatmap.update(self.sessions_db)
 
-        # Build 7 x weeks matrix for last 90 days
-        days_map = self.data.get("days", {})
         today = dt.date.today()
-        start_date = today - dt.timedelta(days=89)  # 90-day window
-        # Align columns to Monday-start week
-        first_monday = start_date - dt.timedelta(days=start_date.weekday())
-        weeks = ((today - first_monday).days // 7) + 1
-        heat = np.zeros((7, weeks), dtype=int)
-
-        # Fill
-        d = start_date
-        while d <= today:
-            key = d.isoformat()
-            val = days_map.get(key, {}).get("focus_sessions", 0)
-            row = d.weekday()  # 0=Mon..6=Sun
-            col = (d - first_monday).days // 7
-            heat[row, col] = val
-            d += dt.timedelta(days=1)
-
-        # Plot
-        fig_w = max(6, weeks * 0.35)  # scale width by weeks
-        fig_h = 2.8
-        fig, ax = plt.subplots(figsize=(fig_w, fig_h), dpi=100)
-        im = ax.imshow(heat, aspect="auto", interpolation="none", cmap="Greens", origin="upper")
-        ax.set_yticks(range(7))
-        ax.set_yticklabels(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"], fontsize=8)
-        ax.set_xticks([])
-        ax.set_title("Focus sessions / day (last 90 days)", fontsize=10)
-        ax.grid(False)
-        for spine in ax.spines.values():
-            spine.set_visible(False)
-        cbar = fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
-        cbar.ax.set_ylabel("sessions", rotation=270, labelpad=10)
-
-        canvas = FigureCanvasTkAgg(fig, master=self.heatmap_area)
-        canvas.draw()
-        widget = canvas.get_tk_widget()
-        widget.pack(fill="both", expand=True)
+        week_sessions, week_minutes = stats.total(today - dt.timedelta(days=today.weekday()), today)
+        # All-time figures come from per-year aggregates, not archived days
+        aggs = self.store.year_aggregates()
+        bests = [a["best"] for a in aggs.values() if a["best"]]
+        best = min(bests, key=lambda b: (-b[1], b[0])) if bests else None
+        best_txt = f"{best[1]} on {best[0]}" if best else "-"
+        current = stats.current_streak(today)
+        if current:
+            end = today if stats.day(today)[0] else today - dt.timedelta(days=1)
+            if end - dt.timedelta(days=current - 1) <= self._stats_from:
+                current += run_ending_year(aggs, self._stats_from.year - 1)  # continues into the archives
+        self.summary_label.config(
+            text=f"This week: {week_sessions} sessions / {week_minutes} min   "
+                 f"Streak: {current} days (best {chain_longest_streak(aggs)})   "
+                 f"Best day: {best_txt}")
 
         if auto_size:
             self.root.update_idletasks()
 
+    def _redraw_stats_when(self, done: threading.Event):
+        """Poll (on the Tk thread) until `done` is set, then refresh the Stats tab once."""
+        if self._stats_wait is not None:
+            self._stats_wait = done  # the newest flush covers the older one
+            return
+        self._stats_wait = done
+
+        def _poll():
+            if not self._stats_wait.is_set():
+                self.root.after(250, _poll)
+                return
+            self._stats_wait = None
+            self._request_refresh("stats")
+        self.root.after(250, _poll)
+
     # ----------------- Utils -----------------
     @staticmethod
     def _format_secs(secs: int) -> str:
@@ -542,7 +897,49 @@ class PomodoroApp:
         return f"{m:02d}:{s:02d}"
 
 
-if __name__ == "__main__":
-    root = tk.Tk()
-    app = PomodoroApp(root)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=APP_NAME)
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print per-phase import and construction times")
+    parser.add_argument("--status-socket", default=os.environ.get("POMODORO_STATUS_SOCKET"),
+                        help="Unix socket for the status endpoint (default: per-user runtime dir)")
+    parser.add_argument("--no-status", action="store_true", help="don't serve the status endpoint")
+    parser.add_argument("--slideshow", metavar="DIR", default=os.environ.get("POMODORO_SLIDESHOW"),
+                        help="rotate the background through the images in DIR at each phase change")
+    parser.add_argument("--slideshow-cache-mb", type=float, default=128,
+                        help="memory ceiling for decoded slideshow images (default 128)")
+    parser.add_argument("--perf", action="store_true",
+                        help="time Tk callbacks and event-loop lag from startup (F12 shows the panel)")
+    args = parser.parse_args(argv)
+
+    PROFILE.enabled = args.profile_startup
+    t_main = time.perf_counter()
+    PROFILE.add("module imports", _T_IMPORTS_DONE - _T_IMPORT0)
+    install_tk_hooks()
+    with PROFILE.phase("create Tk root"):
+        root = tk.Tk()
+    if args.perf or os.environ.get("POMODORO_PERF"):
+        PERF.enable(root)
+    with PROFILE.phase("PomodoroApp()"):
+        app = PomodoroApp(root, status_socket=None if args.no_status else
+                          (args.status_socket or default_socket_path()),
+                          slideshow=args.slideshow, slideshow_cache_mb=args.slideshow_cache_mb)
+
+    def _first_frame():
+        root.update_idletasks()
+        PROFILE.report("time to first frame", time.perf_counter() - t_main + _T_IMPORTS_DONE - _T_IMPORT0)
+        # Stats libraries and the chime load in the background once the timer is usable
+        app._prewarm_stats_imports()
+        app.effects.submit("sound", app.beeper.prepare, label="prepare chime")
+        if app.slides is not None:
+            app.slides.start()
+
+    root.after_idle(_first_frame)
     root.mainloop()
+
+
+if __name__ == "__main__":
+    # Loudness analysis spawns worker processes that re-run this entry point;
+    # in a frozen build (PyInstaller etc.) they must stop here, not open a window.
+    multiprocessing.freeze_support()
+    main()
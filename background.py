@@ -0,0 +1,424 @@
+"""Shared, cached background image for the app's tabs.
+
+The source image is decoded once and kept as a small pyramid of
+pre-reduced copies. Each attached widget gets a cheap preview while the
+window is being resized and a single high-quality LANCZOS pass once the
+size has settled. Finished images are kept in a size-keyed LRU so both
+tabs (which are always the same size) share the work.
+
+`Slideshow` rotates a folder of wallpapers through the same widgets: a
+worker thread scans the folder and decodes/downscales the next image
+ahead of time, and the switch itself only swaps a ready PhotoImage.
+"""
+import bisect
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+from instrument import PERF
+
+# Smallest pyramid level we bother keeping (longest side, px)
+_PYRAMID_MIN_SIDE = 256
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+
+def _cover_box(src_size, target_size):
+    """Centered crop box in `src_size` coordinates that covers `target_size`."""
+    sw, sh = src_size
+    tw, th = target_size
+    scale = max(tw / sw, th / sh)
+    # min/max guard against float round-off pushing the box past the edges
+    cw, ch = min(sw, tw / scale), min(sh, th / scale)
+    left = max(0.0, (sw - cw) / 2)
+    top = max(0.0, (sh - ch) / 2)
+    return (left, top, left + cw, top + ch)
+
+
+def build_pyramid(img):
+    """`img` followed by 2x-reduced copies down to _PYRAMID_MIN_SIDE."""
+    levels = [img]
+    while max(levels[-1].size) // 2 >= _PYRAMID_MIN_SIDE:
+        levels.append(levels[-1].reduce(2))
+    return levels
+
+
+def render_cover(levels, target_size, resample=Image.LANCZOS):
+    """Crop and scale the best pyramid level to cover `target_size`."""
+    tw, th = target_size
+    src = levels[0]
+    for lvl in levels:  # smallest level that still covers the target at >= 1:1
+        lw, lh = lvl.size
+        if max(tw / lw, th / lh) <= 1.0:
+            src = lvl
+        else:
+            break
+    return src.resize(target_size, resample, box=_cover_box(src.size, target_size))
+
+
+def decode_slide(path: str, target_size, max_size):
+    """Decode `path` no larger than needed to cover `max_size` (the screen).
+
+    Returns (pyramid, image rendered for `target_size`). Thread-safe: no Tk.
+    """
+    img = Image.open(path)
+    if img.format == "JPEG":
+        img.draft("RGB", max_size)  # DCT scaling: a 20 MP JPEG decodes at 1/2..1/8 size
+    img = img.convert("RGB")
+    scale = max(max_size[0] / img.width, max_size[1] / img.height)
+    if scale < 1.0:
+        img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+                         Image.LANCZOS, reducing_gap=3.0)
+    levels = build_pyramid(img)
+    return levels, render_cover(levels, target_size)
+
+
+def _pyramid_bytes(levels) -> int:
+    return sum(lvl.width * lvl.height * 3 for lvl in levels)
+
+
+class BackgroundImage:
+    """Decode-once background shared by several Tk widgets.
+
+    `attach(widget, label)` keeps `label` filled with the image scaled to
+    cover `widget`. Resize bursts are debounced: a fast preview filter runs
+    on every <Configure>, the LANCZOS pass runs once after `settle_ms`.
+    """
+
+    def __init__(self, root, path: str = None, cache_bytes: int = 48 * 1024 * 1024,
+                 settle_ms: int = 150, preview_filter=Image.BILINEAR):
+        self.root = root
+        self.path = path
+        self.cache_bytes = int(cache_bytes)
+        self.settle_ms = int(settle_ms)
+        self.preview_filter = preview_filter
+        self._cache = OrderedDict()   # (w, h) -> (PhotoImage, nbytes)
+        self._cache_used = 0
+        self._targets = []
+        self._levels = self._decode(path, root) if path else []
+
+    @property
+    def available(self) -> bool:
+        return bool(self._levels)
+
+    # ----------------- Decoding -----------------
+    @staticmethod
+    def _decode(path: str, root=None):
+        """Open `path` once and build the reduced pyramid (largest first)."""
+        try:
+            img = Image.open(path)
+            if root is not None and img.format == "JPEG":
+                # Let the JPEG decoder skip DCT detail we'll never show
+                try:
+                    sw, sh = root.winfo_screenwidth(), root.winfo_screenheight()
+                    img.draft("RGB", (sw, sh))
+                except Exception:
+                    pass
+            img = img.convert("RGB")
+        except Exception as e:
+            print("[Background] Could not load image:", e)
+            return []
+        return build_pyramid(img)
+
+    def render(self, target_size, resample=Image.LANCZOS):
+        """Return a PIL image cropped and scaled to cover `target_size`."""
+        return render_cover(self._levels, target_size, resample)
+
+    def swap(self, levels, photo=None, size=None):
+        """Show another decoded image; `photo` is its ready rendering at `size`."""
+        self._levels = levels
+        self.clear_cache()
+        if photo is not None:
+            self._cache_put(size, photo)
+        for target in self._targets:
+            self._cancel_settle(target)
+            if target["size"] is None:
+                continue
+            if photo is not None and target["size"] == size:
+                self._show(target, photo)
+            else:  # window was resized since the prefetch; one pass from the pyramid
+                target["after_id"] = self.root.after(0, lambda t=target: self._settle(t))
+
+    def target_size(self):
+        """Current size of the attached widgets (None before the first layout)."""
+        for target in self._targets:
+            if target["size"] is not None:
+                return target["size"]
+        return None
+
+    # ----------------- Cache -----------------
+    def _cache_get(self, size):
+        hit = self._cache.get(size)
+        if hit is None:
+            return None
+        self._cache.move_to_end(size)
+        return hit[0]
+
+    def _cache_put(self, size, photo):
+        nbytes = size[0] * size[1] * 4
+        if nbytes > self.cache_bytes:
+            return
+        old = self._cache.pop(size, None)
+        if old is not None:
+            self._cache_used -= old[1]
+        self._cache[size] = (photo, nbytes)
+        self._cache_used += nbytes
+        while self._cache_used > self.cache_bytes and self._cache:
+            _, (_, freed) = self._cache.popitem(last=False)
+            self._cache_used -= freed
+
+    def clear_cache(self):
+        self._cache.clear()
+        self._cache_used = 0
+
+    # ----------------- Widgets -----------------
+    def attach(self, widget, label):
+        """Keep `label` showing the background sized to `widget`."""
+        target = {"widget": widget, "label": label, "photo": None,
+                  "size": None, "after_id": None}
+        self._targets.append(target)
+        widget.bind("<Configure>", lambda e, t=target: self._on_configure(t))
+        return target
+
+    def _on_configure(self, target):
+        w, h = target["widget"].winfo_width(), target["widget"].winfo_height()
+        if w < 2 or h < 2 or (w, h) == target["size"]:
+            return
+        target["size"] = (w, h)
+        if not self._levels:
+            return  # nothing to show yet (a slideshow fills it in)
+        photo = self._cache_get((w, h))
+        if photo is not None:
+            self._cancel_settle(target)
+            self._show(target, photo)
+            return
+        # Cheap preview now, the proper pass once the drag settles
+        self._show(target, ImageTk.PhotoImage(self.render((w, h), self.preview_filter)))
+        self._cancel_settle(target)
+        target["after_id"] = self.root.after(self.settle_ms, lambda: self._settle(target))
+
+    def _settle(self, target):
+        target["after_id"] = None
+        size = target["size"]
+        if size is None:
+            return
+        photo = self._cache_get(size)
+        if photo is None:
+            photo = ImageTk.PhotoImage(self.render(size))
+            self._cache_put(size, photo)
+        self._show(target, photo)
+
+    def _cancel_settle(self, target):
+        if target["after_id"] is not None:
+            try:
+                self.root.after_cancel(target["after_id"])
+            except Exception:
+                pass
+            target["after_id"] = None
+
+    @staticmethod
+    def _show(target, photo):
+        # Hold a reference: Tk drops the image once the Python object dies
+        target["photo"] = photo
+        target["label"].config(image=photo)
+
+
+class Slideshow:
+    """Rotates the images in `folder` through a BackgroundImage.
+
+    All file-system and decode work runs on one worker thread: `scan`
+    (incremental: only directories whose mtime changed are listed again)
+    and `decode` (JPEG draft + downscale to the screen, then rendered for
+    the current tab size). The Tk thread turns finished decodes into
+    PhotoImages from a short `after` poll that only runs while work is
+    outstanding, and keeps them in an LRU capped at `cache_bytes`.
+    `advance()` (called at phase changes) swaps in the next image if it is
+    ready and otherwise keeps the current one, so it never waits.
+    """
+
+    def __init__(self, bg: BackgroundImage, folder: str, cache_bytes: int = 128 * 1024 * 1024,
+                 exts=IMAGE_EXTS, poll_ms: int = 100):
+        self.bg = bg
+        self.root = bg.root
+        self.folder = os.path.abspath(folder)
+        self.cache_bytes = int(cache_bytes)
+        self.exts = tuple(e.lower() for e in exts)
+        self.poll_ms = int(poll_ms)
+        self.screen = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+        # Tk thread
+        self._files = []              # sorted rel paths from the last scan
+        self._current = None          # rel path on screen
+        self._bad = set()             # files that failed to decode
+        self._ready = OrderedDict()   # rel path -> (levels, photo, size, nbytes)
+        self._ready_used = 0
+        self._queued = set()          # rel paths being decoded
+        self._outstanding = 0         # jobs submitted but not yet drained
+        self._poll_id = None
+        self.swaps = 0
+        self.misses = 0               # phase changes where the next image wasn't ready
+        # Worker thread
+        self._dirs = {}               # rel dir -> (mtime_ns, files, subdirs)
+        self._jobs = queue.Queue()
+        self._done = []               # results for the Tk thread
+        self._done_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="slideshow", daemon=True)
+        self._worker.start()
+
+    # ----------------- Tk side -----------------
+    def start(self):
+        """Scan the folder and prefetch the first slide."""
+        self._submit(("scan",))
+
+    def advance(self) -> bool:
+        """Show the next slide if it is ready; never blocks."""
+        nxt = self._next_path()
+        entry = self._ready.get(nxt) if nxt is not None else None
+        if entry is not None:
+            self._ready.move_to_end(nxt)
+            levels, photo, size, _ = entry
+            with PERF.span("slideshow: swap"):
+                self.bg.swap(levels, photo, size)
+            self._current = nxt
+            self.swaps += 1
+        elif nxt is not None:
+            self.misses += 1
+        self._submit(("scan",))  # picks up added/removed files, then prefetches
+        return entry is not None
+
+    def _next_path(self):
+        files = [f for f in self._files if f not in self._bad] if self._bad else self._files
+        if not files:
+            return None
+        if self._current is None:
+            return files[0]
+        i = bisect.bisect_right(files, self._current)
+        return files[i % len(files)]
+
+    def _prefetch(self):
+        nxt = self._next_path()
+        if nxt is None or nxt == self._current or nxt in self._ready or nxt in self._queued:
+            return
+        size = self.bg.target_size() or (self.root.winfo_width(), self.root.winfo_height())
+        if size[0] < 2 or size[1] < 2:
+            return
+        self._queued.add(nxt)
+        self._submit(("decode", nxt, size, self.screen))
+
+    def _submit(self, job):
+        self._outstanding += 1
+        self._jobs.put(job)
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        with self._done_lock:
+            done, self._done = self._done, []
+        for res in done:
+            self._outstanding -= 1
+            kind = res[0]
+            if kind == "scan":
+                self._files = res[1]
+                self._prefetch()
+            elif kind == "decode":
+                _, rel, levels, img, size = res
+                self._queued.discard(rel)
+                with PERF.span("slideshow: PhotoImage"):
+                    self._put_ready(rel, levels, ImageTk.PhotoImage(img), size)
+                if self._current is None and not self.bg.available:
+                    self.advance()  # no default background: show the first slide now
+            else:
+                _, rel, err = res
+                self._queued.discard(rel)
+                self._bad.add(rel)
+                print(f"[Background] Skipping {rel}: {err}")
+                self._prefetch()
+        if self._outstanding > 0:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def _put_ready(self, rel, levels, photo, size):
+        nbytes = _pyramid_bytes(levels) + size[0] * size[1] * 4
+        old = self._ready.pop(rel, None)
+        if old is not None:
+            self._ready_used -= old[3]
+        self._ready[rel] = (levels, photo, size, nbytes)
+        self._ready_used += nbytes
+        # The newest entry always stays, even if it alone is over the cap
+        while self._ready_used > self.cache_bytes and len(self._ready) > 1:
+            _, (_, _, _, freed) = self._ready.popitem(last=False)
+            self._ready_used -= freed
+
+    @property
+    def cached_bytes(self) -> int:
+        return self._ready_used
+
+    def close(self):
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except Exception:
+                pass
+            self._poll_id = None
+        self._jobs.put(None)
+
+    # ----------------- Worker side -----------------
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            if job[0] == "scan":
+                res = ("scan", self._scan())
+            else:
+                _, rel, size, max_size = job
+                try:
+                    levels, img = decode_slide(os.path.join(self.folder, rel), size, max_size)
+                    res = ("decode", rel, levels, img, size)
+                except Exception as e:
+                    res = ("error", rel, e)
+            with self._done_lock:
+                self._done.append(res)
+
+    def _scan(self):
+        """Sorted image paths; unchanged directories come from the last scan."""
+        dirs = {}
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            full = os.path.join(self.folder, rel)
+            try:
+                mtime = os.stat(full).st_mtime_ns
+            except OSError:
+                continue
+            entry = self._dirs.get(rel)
+            if entry is None or entry[0] != mtime:
+                files, subdirs = [], []
+                try:
+                    with os.scandir(full) as it:
+                        for e in it:
+                            name = os.path.join(rel, e.name) if rel else e.name
+                            try:
+                                if e.is_dir(follow_symlinks=False):
+                                    subdirs.append(name)
+                                elif e.name.lower().endswith(self.exts):
+                                    files.append(name)
+                            except OSError:
+                                continue
+                except OSError:
+                    continue
+                entry = (mtime, files, subdirs)
+            dirs[rel] = entry
+            stack.extend(entry[2])
+        self._dirs = dirs
+        return sorted(f for _, files, _ in dirs.values() for f in files)
+
+
+def load_background(root, rel_path: str, **kwargs):
+    """Return a BackgroundImage for `rel_path`, or None if it can't be read."""
+    if not os.path.exists(rel_path):
+        print("[Background] Missing image:", rel_path)
+        return None
+    bg = BackgroundImage(root, rel_path, **kwargs)
+    return bg if bg.available else None
@@ -0,0 +1,349 @@
+"""Benchmark suite for the app's hot paths.
+
+    python bench/run.py                      # all cases, results to bench/results/
+    python bench/run.py --only load_data --repeat 50
+    python bench/run.py --compare bench/results/OLD.json
+
+Each case runs in its own process so peak RSS is per case. Cases that
+need a display (Tk) are skipped when there is none; run under Xvfb
+(`xvfb-run python bench/run.py`) to include them. Results are written as
+JSON (latency percentiles in ms, peak RSS in MB) for comparing commits.
+"""
+import argparse
+import concurrent.futures as cf
+import datetime as dt
+import json
+import multiprocessing as mp
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synth  # noqa: E402
+
+HISTORY_YEARS = (1, 5, 20)
+MUSIC_FILES = 10000
+IMPORT_ROWS = 100000
+CASES = {}
+
+
+def case(name, needs_display=False):
+    def deco(fn):
+        CASES[name] = (fn, needs_display)
+        return fn
+    return deco
+
+
+def _timed(fn, repeat):
+    out = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t)
+    return out
+
+
+def _has_display():
+    if sys.platform.startswith("win") or sys.platform == "darwin":
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+# ----------------- Cases -----------------
+@case("import_app")
+def bench_import_app(fx, repeat):
+    code = "import app"
+    return _timed(lambda: subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True), repeat)
+
+
+@case("startup_tk", needs_display=True)
+def bench_startup_tk(fx, repeat):
+    code = ("import tkinter as tk, app; r = tk.Tk(); a = app.PomodoroApp(r); "
+            "r.update(); a.music.stop(); r.destroy()")
+    return _timed(lambda: subprocess.run([sys.executable, "-c", code], cwd=fx["tmp"], check=True,
+                                         env=dict(os.environ, PYTHONPATH=ROOT)), repeat)
+
+
+def _history_cases():
+    for years in HISTORY_YEARS:
+        def load_data(fx, repeat, years=years):
+            import shutil
+            from storage import DataStore
+            # Tiered layout (hot months + per-year archives), as after the first run
+            path = os.path.join(fx["tmp"], f"load_{years}y.json")
+            shutil.copy(fx[f"data_{years}y"], path)
+            store = DataStore(path)
+            store.load()
+            store.close()
+
+            def load():
+                s = DataStore(path)
+                s.load()
+                s._lock_file.close()  # drop the writer lock without close()'s compaction
+            return _timed(load, repeat)
+
+        def save_session(fx, repeat, years=years):
+            import shutil
+            from storage import DataStore
+            path = os.path.join(fx["tmp"], f"save_{years}y.json")
+            shutil.copy(fx[f"data_{years}y"], path)
+            store = DataStore(path, compact_every=10 ** 9)
+            store.load()
+            today = dt.date.today().isoformat()
+            res = _timed(lambda: store.log_session(today, 25), repeat)
+            store._journal.close()
+            return res
+
+        def compact(fx, repeat, years=years):
+            import shutil
+            from storage import DataStore
+            path = os.path.join(fx["tmp"], f"compact_{years}y.json")
+            shutil.copy(fx[f"data_{years}y"], path)
+            store = DataStore(path, compact_every=10 ** 9)
+            store.load()
+            return _timed(store.compact, repeat)
+
+        def heatmap_matrix(fx, repeat, years=years):
+            import json as _json
+            from stats_index import StatsIndex
+            with open(fx[f"data_{years}y"], encoding="utf-8") as f:
+                days = _json.load(f)["days"]
+            today = dt.date.today()
+            return _timed(lambda: StatsIndex.from_days(days).heat_matrix(today, 90), repeat)
+
+        case(f"load_data[{years}y]")(load_data)
+        case(f"save_session[{years}y]")(save_session)
+        case(f"compact[{years}y]")(compact)
+        case(f"heatmap_matrix[{years}y]")(heatmap_matrix)
+
+
+_history_cases()
+
+
+@case("heatmap_update_agg")
+def bench_heatmap_update(fx, repeat):
+    """HeatmapView.update() path (set_data + redraw) on an Agg canvas."""
+    import json as _json
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    import heatmap
+    from stats_index import StatsIndex
+
+    class AggHeatmap(heatmap.HeatmapView):
+        def _make_canvas(self, fig):
+            return FigureCanvasAgg(fig)
+
+    with open(fx["data_5y"], encoding="utf-8") as f:
+        index = StatsIndex.from_days(_json.load(f)["days"])
+    view = AggHeatmap(None)
+    view.update(index)
+
+    def step():
+        index.add(dt.date.today(), 1, 25)
+        view.update(index)
+        view.canvas.draw()  # draw_idle only schedules; force the real render
+    return _timed(step, repeat)
+
+
+@case("history_import[100k]")
+def bench_history_import(fx, repeat):
+    """history_io.import_history of a session-per-row CSV into a 5y data.json."""
+    import shutil
+    import history_io
+    path = os.path.join(fx["tmp"], "import_5y.json")
+
+    def step():
+        shutil.copy(fx["data_5y"], path)
+        history_io.import_history(fx["import_csv"], path, db_path=None)
+    return _timed(step, repeat)
+
+
+def _bg():
+    from background import BackgroundImage
+    return BackgroundImage(None, os.path.join(ROOT, "assets", "bg.jpg"))
+
+
+@case("bg_decode")
+def bench_bg_decode(fx, repeat):
+    return _timed(_bg, repeat)
+
+
+def _drag_sizes(repeat):
+    # A window edge being dragged from 680x460 outwards, 4 px per event
+    return [(680 + 4 * i, 460 + 3 * i) for i in range(repeat)]
+
+
+@case("bg_resize_preview")
+def bench_bg_preview(fx, repeat):
+    from PIL import Image
+    bg, sizes = _bg(), iter(_drag_sizes(repeat))
+    return _timed(lambda: bg.render(next(sizes), Image.BILINEAR), repeat)
+
+
+@case("bg_resize_lanczos")
+def bench_bg_lanczos(fx, repeat):
+    bg, sizes = _bg(), iter(_drag_sizes(repeat))
+    return _timed(lambda: bg.render(next(sizes)), repeat)
+
+
+def _library(fx, name):
+    from music_library import MusicLibrary
+    return MusicLibrary(fx["music"], os.path.join(fx["tmp"], name))
+
+
+@case("music_scan_cold[10k]")
+def bench_music_scan_cold(fx, repeat):
+    """First run: no index yet, every directory is listed."""
+    def step():
+        lib = _library(fx, "cold_index.json")
+        lib.rescan()
+        os.remove(lib.index_path)
+    return _timed(step, repeat)
+
+
+@case("music_scan_warm[10k]")
+def bench_music_scan_warm(fx, repeat):
+    """Later runs: load the index, then a rescan with nothing changed."""
+    _library(fx, "warm_index.json").rescan()
+
+    def step():
+        lib = _library(fx, "warm_index.json")
+        lib.load_index()
+        lib.rescan()
+    return _timed(step, repeat)
+
+
+@case("music_playlist[10k]")
+def bench_music_playlist(fx, repeat):
+    """MusicPlayer._load_playlist from a cached index (what playback waits on)."""
+    import app
+    index = os.path.join(fx["tmp"], "player_index.json")
+    _library(fx, "player_index.json").rescan()
+
+    def step():
+        app.MusicPlayer(fx["music"], index_path=index)._load_playlist()
+    return _timed(step, repeat)
+
+
+@case("loudness_measure[3min]")
+def bench_loudness_measure(fx, repeat):
+    """loudness.measure on 3 min of mono noise: the numpy half of one track's
+    analysis (`python loudness.py music/` reports end-to-end tracks/s)."""
+    import numpy as np
+    import loudness
+    x = (np.random.default_rng(0).standard_normal(loudness.RATE * 180) * 0.1).astype(np.float32)
+    return _timed(lambda: loudness.measure(x), repeat)
+
+
+# ----------------- Runner -----------------
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _run_case(name, fx, repeat):
+    os.chdir(fx["tmp"])
+    fn, _ = CASES[name]
+    samples = fn(fx, repeat)
+    return samples, _peak_rss_mb()
+
+
+def _summary(samples, rss):
+    s = sorted(x * 1000.0 for x in samples)
+
+    def pct(p):
+        return s[min(len(s) - 1, int(round(p / 100.0 * (len(s) - 1))))]
+    return {"n": len(s), "mean_ms": sum(s) / len(s), "min_ms": s[0], "p50_ms": pct(50),
+            "p90_ms": pct(90), "p99_ms": pct(99), "max_ms": s[-1], "peak_rss_mb": rss}
+
+
+def make_fixtures(tmp):
+    fx = {"tmp": tmp}
+    for years in HISTORY_YEARS:
+        fx[f"data_{years}y"] = synth.write_data_json(os.path.join(tmp, f"data_{years}y.json"), years, seed=years)
+    fx["import_csv"] = synth.write_history_csv(os.path.join(tmp, "import.csv"), IMPORT_ROWS, seed=7)
+    fx["music"] = synth.make_music_folder(os.path.join(tmp, "music"), MUSIC_FILES, per_dir=100)
+    return fx
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(old_path, new):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    print(f"\n{'case':<26}{'old p50':>10}{'new p50':>10}{'ratio':>8}")
+    for name, res in new["cases"].items():
+        prev = old.get("cases", {}).get(name)
+        if not prev or "p50_ms" not in prev or "p50_ms" not in res:
+            continue
+        ratio = res["p50_ms"] / prev["p50_ms"] if prev["p50_ms"] else float("inf")
+        flag = "  <-- slower" if ratio > 1.2 else ""
+        print(f"{name:<26}{prev['p50_ms']:>10.2f}{res['p50_ms']:>10.2f}{ratio:>8.2f}{flag}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the app's hot paths.")
+    ap.add_argument("--only", action="append", default=[], help="substring filter (repeatable)")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--out", help="results file (default bench/results/<rev>-<time>.json)")
+    ap.add_argument("--compare", help="previous results file to diff against")
+    ap.add_argument("--list", action="store_true")
+    args = ap.parse_args(argv)
+
+    names = [n for n in CASES if not args.only or any(o in n for o in args.only)]
+    if args.list:
+        print("\n".join(names))
+        return
+    display = _has_display()
+    results = {"meta": {"rev": _git_rev(), "python": platform.python_version(),
+                        "platform": platform.platform(), "time": dt.datetime.now().isoformat(timespec="seconds"),
+                        "repeat": args.repeat, "display": display},
+               "cases": {}}
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="pomodoro-bench-") as tmp:
+        fx = make_fixtures(tmp)
+        print(f"{'case':<26}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'rss MB':>9}")
+        for name in names:
+            if CASES[name][1] and not display:
+                results["cases"][name] = {"skipped": "no display"}
+                print(f"{name:<26}  skipped (no display)")
+                continue
+            with cf.ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+                try:
+                    samples, rss = ex.submit(_run_case, name, fx, args.repeat).result()
+                except Exception as e:
+                    results["cases"][name] = {"error": repr(e)}
+                    print(f"{name:<26}  error: {e!r}")
+                    continue
+            res = results["cases"][name] = _summary(samples, rss)
+            rss_txt = f"{res['peak_rss_mb']:.0f}" if res["peak_rss_mb"] is not None else "-"
+            print(f"{name:<26}{res['p50_ms']:>9.2f}{res['p90_ms']:>9.2f}{res['p99_ms']:>9.2f}"
+                  f"{res['max_ms']:>9.2f}{rss_txt:>9}")
+
+    out = args.out or os.path.join(ROOT, "bench", "results",
+                                   f"{results['meta']['rev']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults: {out}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""Long-run soak test: weeks of simulated use through the real PomodoroApp.
+
+    xvfb-run python bench/soak.py                  # 14 simulated days
+    xvfb-run python bench/soak.py --days 60 --out soak.json
+
+The engine clock and the app's idea of "now"/"today" are replaced by a
+simulated clock, so each phase ends as soon as the driver advances it.
+Every simulated day runs focus/break cycles plus pauses, mode changes,
+window resizes, music toggles and Stats tab switches. After each day the
+script samples RSS, Python heap (tracemalloc), live Tk widgets/images/
+pending `after` timers, matplotlib figures and threads, and exits non-zero
+if anything grew past its threshold since the first (warm-up) day.
+
+Data, session DB and music index go to a temp dir; music plays through
+the dummy SDL driver unless SDL_AUDIODRIVER is already set. The music
+thread keeps real time (it sleeps until each track ends), only the timer
+runs on the simulated clock.
+"""
+import argparse
+import datetime as dt
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DAY = 24 * 3600
+
+
+class SimClock:
+    """Monotonic + wall clock that only moves when told to."""
+
+    def __init__(self, start_wall: float = None):
+        self.mono = 1000.0
+        self._wall_offset = (start_wall if start_wall is not None else time.time()) - self.mono
+
+    def monotonic(self) -> float:
+        return self.mono
+
+    def time(self) -> float:
+        return self.mono + self._wall_offset
+
+    def today(self) -> dt.date:
+        return dt.date.fromtimestamp(self.time())
+
+    def advance(self, secs: float):
+        self.mono += max(0.0, secs)
+
+    def secs_until(self, hour: int) -> float:
+        """Seconds until the next local `hour`:00."""
+        now = dt.datetime.fromtimestamp(self.time())
+        target = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+        if target <= now:
+            target += dt.timedelta(days=1)
+        return (target - now).total_seconds()
+
+
+class _Proxy(types.ModuleType):
+    """Module stand-in: a few names overridden, everything else delegated."""
+
+    def __init__(self, real, **overrides):
+        super().__init__(real.__name__)
+        self.__dict__.update(overrides)
+        self._real = real
+
+    def __getattr__(self, name):
+        return getattr(self._real, name)
+
+
+def install_clock(clock: SimClock):
+    """Point app/heatmap/stats_index/storage at `clock` for wall time and today()."""
+    import app
+    import heatmap
+    import stats_index
+    import storage
+
+    class SimDate(dt.date):
+        @classmethod
+        def today(cls):
+            return clock.today()
+
+    sim_dt = _Proxy(dt, date=SimDate)
+    for mod in (app, heatmap, stats_index, storage):
+        mod.dt = sim_dt
+    app.time = _Proxy(time, time=clock.time)
+    return app
+
+
+# ----------------- Sampling -----------------
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil  # optional
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def _count_widgets(w) -> int:
+    return 1 + sum(_count_widgets(c) for c in w.winfo_children())
+
+
+def _count_figures() -> int:
+    if "matplotlib.figure" not in sys.modules:
+        return 0
+    Figure = sys.modules["matplotlib.figure"].Figure
+    return sum(1 for o in gc.get_objects() if isinstance(o, Figure))
+
+
+def sample(root, day: int) -> dict:
+    gc.collect()
+    root.update()
+    return {
+        "day": day,
+        "rss_mb": _rss_mb(),
+        "py_mb": tracemalloc.get_traced_memory()[0] / (1024 * 1024),
+        "widgets": _count_widgets(root),
+        "tk_images": len(root.image_names()),
+        "after_pending": len(root.tk.splitlist(root.tk.call("after", "info"))),
+        "figures": _count_figures(),
+        "threads": threading.active_count(),
+    }
+
+
+# ----------------- Driver -----------------
+class Soak:
+    def __init__(self, app, clock: SimClock, rng: random.Random, settle_secs: float):
+        self.app = app
+        self.root = app.root
+        self.clock = clock
+        self.rng = rng
+        self.settle_secs = settle_secs
+        self.phases = 0
+        self.events = {"resize": 0, "music": 0, "stats": 0, "pause": 0, "mode": 0}
+
+    def pump(self, secs: float = 0.0):
+        """Process pending Tk work, for at least `secs` of real time."""
+        end = time.perf_counter() + secs
+        while True:
+            self.root.update()
+            if time.perf_counter() >= end:
+                return
+            time.sleep(0.01)
+
+    def advance(self, secs: float):
+        """Move the simulated clock and deliver the tick(s) Tk would have run."""
+        app = self.app
+        app._cancel_tick()
+        self.clock.advance(secs)
+        if app.engine.running:
+            app._tick()
+        self.pump()
+
+    def run_phase(self):
+        app = self.app
+        if not app.engine.running:
+            app.start()
+        # A few ordinary second ticks, then the deadline itself
+        for _ in range(3):
+            self.advance(self.rng.uniform(1, 90))
+        if self.rng.random() < 0.1:
+            self.events["pause"] += 1
+            app.pause()
+            self.clock.advance(self.rng.uniform(5, 300))
+            app.start()
+        self.advance(app.engine.remaining_at() + self.rng.uniform(0, 0.05))
+        self.phases += 1
+        n = self.phases
+        if n % 4 == 0:
+            self.resize()
+        if n % 7 == 0:
+            self.toggle_music()
+        if n % 5 == 0:
+            self.show_stats()
+        if n % 97 == 0:
+            self.change_mode()
+
+    def resize(self):
+        self.events["resize"] += 1
+        w, h = self.rng.randint(600, 1100), self.rng.randint(420, 800)
+        self.root.geometry(f"{w}x{h}")
+        self.pump(self.settle_secs)  # let the background's settle pass run
+
+    def toggle_music(self):
+        self.events["music"] += 1
+        self.app.music_enabled.set(not self.app.music_enabled.get())
+        self.app._toggle_music()
+
+    def show_stats(self):
+        import app as app_mod
+        self.events["stats"] += 1
+        app = self.app
+        app.nb.select(app.stats_tab)
+        self.pump()
+        views = list(app_mod.STATS_VIEWS)
+        app.stats_view_var.set(views[self.events["stats"] % len(views)])
+        app._render_heatmap()
+        app.nb.select(app.timer_tab)
+        self.pump()
+
+    def change_mode(self):
+        self.events["mode"] += 1
+        app = self.app
+        app.mode_var.set("50 / 10" if app.mode_var.get() == "25 / 5" else "25 / 5")
+        app._on_change_mode()
+
+    def run_day(self, cycles: int):
+        for _ in range(cycles * 2):
+            self.run_phase()
+        # Stop for the night; the running phase is logged as abandoned
+        self.app.reset()
+        self.clock.advance(self.clock.secs_until(9))
+        self.pump()
+
+
+def check(samples, limits) -> list:
+    """Threshold violations between the warm-up sample and the last one."""
+    base, last = samples[0], samples[-1]
+    failures = []
+    for key, limit in limits.items():
+        if base.get(key) is None or last.get(key) is None:
+            continue
+        growth = last[key] - base[key]
+        if growth > limit:
+            failures.append(f"{key} grew {growth:+.1f} (limit {limit:g}): {base[key]:.1f} -> {last[key]:.1f}")
+    return failures
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Soak-test PomodoroApp on a simulated clock.")
+    ap.add_argument("--days", type=int, default=14, help="simulated days to run")
+    ap.add_argument("--cycles-per-day", type=int, default=10, help="focus+break pairs per day")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--settle-secs", type=float, default=0.2, help="real time given to each resize")
+    ap.add_argument("--max-rss-mb", type=float, default=25.0)
+    ap.add_argument("--max-py-mb", type=float, default=8.0)
+    ap.add_argument("--max-count-growth", type=int, default=2,
+                    help="allowed growth in widgets, Tk images, after timers, figures and threads")
+    ap.add_argument("--top", type=int, default=10, help="tracemalloc allocators to list")
+    ap.add_argument("--out", help="write samples and the verdict as JSON")
+    args = ap.parse_args(argv)
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"[Soak] No display ({e}); run under xvfb-run.")
+        return 2
+
+    tracemalloc.start()
+    clock = SimClock()
+    app_mod = install_clock(clock)
+    with tempfile.TemporaryDirectory(prefix="pomodoro-soak-") as tmp:
+        app_mod.DATA_FILE = os.path.join(tmp, "data.json")
+        app_mod.SESSIONS_DB = os.path.join(tmp, "sessions.db")
+        app_mod.MUSIC_INDEX = os.path.join(tmp, "music_index.json")
+        app = app_mod.PomodoroApp(root)
+        app.engine.clock = clock.monotonic
+        soak = Soak(app, clock, random.Random(args.seed), args.settle_secs)
+        soak.pump(0.5)
+
+        samples, base_snap = [], None
+        t0 = time.perf_counter()
+        print(f"{'day':>4}{'rss MB':>9}{'py MB':>8}{'widgets':>9}{'images':>8}{'after':>7}{'figs':>6}{'threads':>9}")
+        for day in range(args.days):
+            soak.run_day(args.cycles_per_day)
+            s = sample(root, day + 1)
+            samples.append(s)
+            if base_snap is None:
+                base_snap = tracemalloc.take_snapshot()
+            rss = f"{s['rss_mb']:.1f}" if s["rss_mb"] is not None else "-"
+            print(f"{s['day']:>4}{rss:>9}{s['py_mb']:>8.1f}{s['widgets']:>9}{s['tk_images']:>8}"
+                  f"{s['after_pending']:>7}{s['figures']:>6}{s['threads']:>9}")
+
+        top = tracemalloc.take_snapshot().compare_to(base_snap, "lineno")[:args.top]
+        elapsed = time.perf_counter() - t0
+        app._on_close()
+
+    limits = {"rss_mb": args.max_rss_mb, "py_mb": args.max_py_mb}
+    for key in ("widgets", "tk_images", "after_pending", "figures", "threads"):
+        limits[key] = args.max_count_growth
+    failures = check(samples, limits)
+
+    print(f"\n[Soak] {soak.phases} phases over {args.days} simulated days in {elapsed:.1f}s; events {soak.events}")
+    print("[Soak] Top allocators since day 1:")
+    for stat in top:
+        print("   ", stat)
+    for f in failures:
+        print("[Soak] FAIL", f)
+    if not failures:
+        print("[Soak] OK: no growth above thresholds")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "phases": soak.phases, "events": soak.events,
+                       "samples": samples, "top": [str(s) for s in top], "failures": failures}, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""Synthetic fixtures for the benchmarks: data.json histories and music folders."""
+import datetime as dt
+import json
+import os
+import random
+
+
+def make_days(years: float, seed: int = 0, today: dt.date = None) -> dict:
+    """A `days` map covering `years` of history with ~70% active days."""
+    rng = random.Random(seed)
+    today = today or dt.date.today()
+    days = {}
+    for i in range(int(years * 365)):
+        if rng.random() < 0.7:
+            n = rng.randint(1, 10)
+            days[(today - dt.timedelta(days=i)).isoformat()] = {"focus_sessions": n, "minutes": n * 25}
+    return days
+
+
+def write_data_json(path: str, years: float, seed: int = 0) -> str:
+    data = {"days": make_days(years, seed), "settings": {"playlist_url": ""}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def write_history_csv(path: str, rows: int, years: float = 10, seed: int = 0) -> str:
+    """One-row-per-session CSV export from "another tracker" (see history_io)."""
+    rng = random.Random(seed)
+    today = dt.date.today()
+    span = int(years * 365)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("start,minutes,task\n")
+        for _ in range(rows):
+            day = today - dt.timedelta(days=rng.randrange(span))
+            f.write(f"{day.isoformat()}T{rng.randrange(24):02d}:{rng.randrange(60):02d}:00,25,focus\n")
+    return path
+
+
+def make_music_folder(path: str, n: int = 10000, per_dir: int = 0) -> str:
+    """`n` empty .mp3 files (plus some non-audio noise). With `per_dir`,
+    spread them over subfolders of that size."""
+    os.makedirs(path, exist_ok=True)
+    for i in range(n):
+        sub = path if not per_dir else os.path.join(path, f"album{i // per_dir:04d}")
+        if per_dir:
+            os.makedirs(sub, exist_ok=True)
+        open(os.path.join(sub, f"track{i:05d}.mp3"), "wb").close()
+        if i % 10 == 0:
+            open(os.path.join(sub, f"cover{i:05d}.jpg"), "wb").close()
+    return path
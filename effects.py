@@ -0,0 +1,183 @@
+"""Off-Tk-thread side effects for phase changes.
+
+The Tk thread only enqueues work here. Each lane ("store", "notify",
+"sound") is one daemon worker running its jobs in order, so a journal
+fsync never waits behind a desktop notification and a notification
+backend that hangs (plyer over D-Bus/Win32 can take seconds) only stalls
+its own lane. A lane stuck on one job for longer than its timeout is
+reported, and lanes marked droppable skip new jobs until it recovers
+instead of piling them up. Workers are daemon threads (not
+concurrent.futures, whose workers are joined at exit) so a hung call can
+never keep the app from closing.
+
+`Beeper` renders the phase-change chime into a `pygame.mixer.Sound` once,
+so playing it is a non-blocking call on the Tk thread.
+"""
+import math
+import queue
+import threading
+import time
+from array import array
+
+from instrument import PERF
+
+# name -> (timeout secs, drop new jobs while a job is over its timeout)
+LANES = {
+    "store": (5.0, False),    # session journal: never dropped, only reported
+    "notify": (3.0, True),
+    "sound": (2.0, True),
+}
+
+
+class _Lane:
+    def __init__(self, name: str, timeout: float, droppable: bool):
+        self.name = name
+        self.timeout = float(timeout)
+        self.droppable = droppable
+        self.busy_since = None      # perf_counter() when the current job started
+        self.current = None
+        self.reported = False
+        self._q = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"effects-{name}", daemon=True)
+        self._thread.start()
+
+    def put(self, job):
+        self._q.put(job)
+
+    def overdue(self, now: float = None) -> float:
+        """Seconds the current job is past its timeout (0 if none)."""
+        since = self.busy_since
+        if since is None:
+            return 0.0
+        now = time.perf_counter() if now is None else now
+        return max(0.0, now - since - self.timeout)
+
+    def _run(self):
+        while True:
+            job = self._q.get()
+            if job is None:
+                self._q.task_done()
+                return
+            label, fn, args, kwargs = job
+            self.current = label
+            self.busy_since = t = time.perf_counter()
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                print(f"[Effects] {label} failed:", e)
+            secs = time.perf_counter() - t
+            self.busy_since = None
+            self.current = None
+            if secs > self.timeout:
+                print(f"[Effects] {label} took {secs:.1f}s (timeout {self.timeout:g}s)")
+            self.reported = False
+            if PERF.enabled:
+                PERF.record(f"effect: {label}", secs)
+            self._q.task_done()
+
+    def join(self, timeout: float) -> bool:
+        """Wait until everything queued so far has run; False on timeout."""
+        done = threading.Event()
+        self._q.put((f"{self.name}:flush", done.set, (), {}))
+        return done.wait(timeout)
+
+    def stop(self):
+        self._q.put(None)
+
+
+class EffectDispatcher:
+    """Named worker lanes for side effects the Tk thread must not wait on."""
+
+    def __init__(self, lanes: dict = None):
+        self._lanes = {name: _Lane(name, timeout, droppable)
+                       for name, (timeout, droppable) in (lanes or LANES).items()}
+
+    def submit(self, lane: str, fn, *args, label: str = None, **kwargs) -> bool:
+        """Queue `fn(*args, **kwargs)` on `lane`; False if it was dropped."""
+        ln = self._lanes[lane]
+        label = label or getattr(fn, "__name__", lane)
+        late = ln.overdue()
+        if late:
+            if not ln.reported:
+                ln.reported = True
+                print(f"[Effects] {ln.current} has been running {late + ln.timeout:.1f}s")
+            if ln.droppable:
+                print(f"[Effects] {lane} lane stuck; dropped {label}")
+                return False
+        ln.put((label, fn, args, kwargs))
+        return True
+
+    def flush(self, lane: str, timeout: float = 2.0) -> bool:
+        """Block until `lane` has run everything queued so far."""
+        ok = self._lanes[lane].join(timeout)
+        if not ok:
+            print(f"[Effects] {lane} lane did not drain within {timeout:g}s")
+        return ok
+
+    def shutdown(self, timeout: float = 5.0, wait=("store",)):
+        """Drain the lanes in `wait` (bounded by `timeout`) and stop all workers."""
+        deadline = time.perf_counter() + timeout
+        for name in wait:
+            self.flush(name, max(0.0, deadline - time.perf_counter()))
+        for ln in self._lanes.values():
+            ln.stop()
+
+
+class Beeper:
+    """Phase-change chime pre-rendered into a mixer Sound.
+
+    `prepare()` starts the mixer (via `init_mixer`, shared with the music
+    player) and renders the tones; call it off the Tk thread. `play()` only
+    starts playback and returns False until a Sound is ready.
+    """
+
+    def __init__(self, init_mixer, tones=((880, 0.18), (660, 0.18)), volume: float = 0.5):
+        self.init_mixer = init_mixer
+        self.tones = tones
+        self.volume = volume
+        self._sound = None
+
+    @property
+    def ready(self) -> bool:
+        return self._sound is not None
+
+    def prepare(self) -> bool:
+        if self._sound is not None:
+            return True
+        if self.init_mixer is None or not self.init_mixer():
+            return False
+        import pygame
+        spec = pygame.mixer.get_init()
+        if not spec:
+            return False
+        freq, fmt, channels = spec
+        if fmt not in (-16, 16):
+            return False  # only signed/unsigned 16-bit output is rendered here
+        samples = self._render(freq, channels, signed=fmt < 0)
+        self._sound = pygame.mixer.Sound(buffer=samples.tobytes())
+        self._sound.set_volume(self.volume)
+        return True
+
+    def _render(self, freq: int, channels: int, signed: bool = True):
+        amp = 0.6 * 32767
+        fade = max(1, int(freq * 0.005))  # 5 ms ramps so the tones don't click
+        out = array("h" if signed else "H")
+        offset = 0 if signed else 32768
+        for hz, secs in self.tones:
+            n = int(freq * secs)
+            step = 2 * math.pi * hz / freq
+            for i in range(n):
+                env = min(1.0, i / fade, (n - 1 - i) / fade)
+                v = int(amp * env * math.sin(step * i)) + offset
+                out.extend([v] * channels)
+        return out
+
+    def play(self) -> bool:
+        if self._sound is None:
+            return False
+        try:
+            self._sound.play()  # mixes on SDL's audio thread; returns immediately
+            return True
+        except Exception as e:
+            print("[Effects] beep failed:", e)
+            return False
@@ -0,0 +1,217 @@
+"""GUI-free Pomodoro state machine and an asyncio manager for many timers.
+
+`PomodoroEngine` holds one timer's phase/deadline state and is driven by
+an injectable clock, so the Tk app, tests and servers can all use it.
+`SessionManager` runs any number of engines from a single heap of
+deadlines on one asyncio task and delivers phase changes in batches.
+"""
+import asyncio
+import heapq
+import inspect
+import itertools
+import time
+from collections import deque, namedtuple
+
+FOCUS = "focus"
+BREAK = "break"
+
+# One finished phase. `at` is the engine-clock time the phase was due to end.
+PhaseChange = namedtuple("PhaseChange", "engine ended started at")
+
+
+class PomodoroEngine:
+    """One timer: focus/break phases counted down against `clock()`.
+
+    While running, the phase end is stored as an absolute `deadline` on the
+    engine clock; while paused, the exact float `remaining` is kept, so
+    pause/resume never accumulates rounding error.
+    """
+
+    __slots__ = ("focus_secs", "break_secs", "phase", "running", "deadline", "remaining",
+                 "completed_focus", "auto_continue", "clock", "sid", "gen", "user")
+
+    def __init__(self, focus_secs: float = 25 * 60, break_secs: float = 5 * 60,
+                 clock=time.monotonic, auto_continue: bool = False, sid=None, user=None):
+        self.focus_secs = float(focus_secs)
+        self.break_secs = float(break_secs)
+        self.clock = clock
+        self.auto_continue = auto_continue  # start the next phase right at the deadline
+        self.sid = sid
+        self.user = user                    # opaque slot for the owner (e.g. a team member id)
+        self.phase = FOCUS
+        self.running = False
+        self.deadline = None
+        self.remaining = self.focus_secs
+        self.completed_focus = 0
+        self.gen = 0                        # bumped on every schedule change (see SessionManager)
+
+    def phase_duration(self, phase: str = None) -> float:
+        return self.focus_secs if (phase or self.phase) == FOCUS else self.break_secs
+
+    def set_durations(self, focus_secs: float, break_secs: float):
+        """Change the mode; a stopped timer picks up the new length immediately."""
+        self.focus_secs = float(focus_secs)
+        self.break_secs = float(break_secs)
+        if not self.running:
+            self.remaining = self.phase_duration()
+
+    def start(self, now: float = None):
+        if self.running:
+            return
+        now = self.clock() if now is None else now
+        self.running = True
+        self.deadline = now + self.remaining
+        self.gen += 1
+
+    def pause(self, now: float = None):
+        if not self.running:
+            return
+        now = self.clock() if now is None else now
+        self.running = False
+        self.remaining = max(0.0, self.deadline - now)
+        self.deadline = None
+        self.gen += 1
+
+    def reset(self):
+        self.running = False
+        self.phase = FOCUS
+        self.deadline = None
+        self.remaining = self.phase_duration()
+        self.gen += 1
+
+    def remaining_at(self, now: float = None) -> float:
+        if not self.running:
+            return self.remaining
+        now = self.clock() if now is None else now
+        return max(0.0, self.deadline - now)
+
+    def poll(self, now: float = None):
+        """Advance past the deadline if it has passed; return a PhaseChange or None."""
+        if not self.running:
+            return None
+        now = self.clock() if now is None else now
+        if now < self.deadline:
+            return None
+        ended, due = self.phase, self.deadline
+        if ended == FOCUS:
+            self.completed_focus += 1
+        self.phase = BREAK if ended == FOCUS else FOCUS
+        self.remaining = self.phase_duration()
+        self.gen += 1
+        if self.auto_continue:
+            # Chain from the old deadline, not `now`, so lateness never drifts
+            self.deadline = due + self.remaining
+        else:
+            self.running = False
+            self.deadline = None
+        return PhaseChange(self, ended, self.phase, due)
+
+
+class SessionManager:
+    """Drive many PomodoroEngines from one asyncio task and one deadline heap.
+
+    Engines are scheduled lazily: the heap holds (deadline, seq, gen, engine)
+    and entries whose `gen` no longer matches the engine are skipped, so
+    start/pause/reset are O(log n) and never scan the heap.
+    `on_batch(list_of_PhaseChange)` may be a plain function or a coroutine.
+    All methods must be called from the event loop's thread.
+    """
+
+    def __init__(self, on_batch=None, clock=time.monotonic):
+        self.on_batch = on_batch
+        self.clock = clock
+        self.engines = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._sids = itertools.count(1)
+        self._wake = None
+        self._stopping = False
+        self.fired = 0
+        self.lag = deque(maxlen=65536)  # seconds late per recent fired deadline
+
+    # ----------------- Sessions -----------------
+    def add(self, focus_secs: float = 25 * 60, break_secs: float = 5 * 60,
+            auto_continue: bool = True, start: bool = True, user=None) -> PomodoroEngine:
+        eng = PomodoroEngine(focus_secs, break_secs, clock=self.clock,
+                             auto_continue=auto_continue, sid=next(self._sids), user=user)
+        self.engines[eng.sid] = eng
+        if start:
+            self.start(eng.sid)
+        return eng
+
+    def remove(self, sid):
+        eng = self.engines.pop(sid, None)
+        if eng is not None:
+            eng.gen += 1  # orphan any heap entry
+
+    def start(self, sid, now: float = None):
+        eng = self.engines[sid]
+        if eng.running:
+            return
+        eng.start(now)
+        self._push(eng)
+
+    def pause(self, sid):
+        self.engines[sid].pause()
+
+    def reset(self, sid):
+        self.engines[sid].reset()
+
+    def _push(self, eng):
+        if not eng.running:
+            return
+        top = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (eng.deadline, next(self._seq), eng.gen, eng))
+        if (top is None or eng.deadline < top) and self._wake is not None and not self._wake.done():
+            self._wake.set_result(None)
+
+    # ----------------- Loop -----------------
+    def _pop_due(self, now: float):
+        batch = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            deadline, _, gen, eng = heapq.heappop(heap)
+            if gen != eng.gen or eng.sid not in self.engines:
+                continue  # stale entry (paused/reset/removed since it was pushed)
+            change = eng.poll(now)
+            if change is None:
+                continue
+            self.lag.append(now - deadline)
+            batch.append(change)
+            self._push(eng)
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self._stopping = False
+        while not self._stopping:
+            # Drop stale entries so the sleep targets a real deadline
+            while self._heap and self._heap[0][2] != self._heap[0][3].gen:
+                heapq.heappop(self._heap)
+            self._wake = loop.create_future()
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, self._heap[0][0] - self.clock())
+            if timeout is None or timeout > 0:
+                await asyncio.wait([self._wake], timeout=timeout)
+            if self._stopping:
+                break
+            batch = self._pop_due(self.clock())
+            if batch:
+                self.fired += len(batch)
+                await self._deliver(batch)
+
+    async def _deliver(self, batch):
+        if self.on_batch is None:
+            return
+        try:
+            res = self.on_batch(batch)
+            if inspect.isawaitable(res):
+                await res
+        except Exception as e:
+            print("[Engine] on_batch error:", e)
+
+    def stop(self):
+        self._stopping = True
+        if self._wake is not None and not self._wake.done():
+            self._wake.set_result(None)
@@ -0,0 +1,183 @@
+"""Heatmap views for the Stats tab.
+
+Each view builds its figure, colorbar and Tk canvas once. New data only
+swaps the image array and colour limits; the figure is rebuilt when the
+layout changes (e.g. the 90-day window rolls into a new week column).
+"""
+import datetime as dt
+
+import numpy as np
+from matplotlib.figure import Figure
+
+WINDOW_DAYS = 90
+_EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+WEEKDAY_LABELS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def heat_window(today: dt.date, window_days: int = WINDOW_DAYS):
+    """Return (start_date, first_monday, weeks) for the window ending `today`."""
+    start_date = today - dt.timedelta(days=window_days - 1)
+    # Align columns to Monday-start week
+    first_monday = start_date - dt.timedelta(days=start_date.weekday())
+    weeks = ((today - first_monday).days // 7) + 1
+    return start_date, first_monday, weeks
+
+
+def build_heat_matrix(index, today: dt.date, window_days: int = WINDOW_DAYS):
+    """7 x weeks matrix of focus sessions per day (rows Mon..Sun).
+
+    `index` is a stats_index.StatsIndex; the matrix is a reshape of its
+    per-day array, not a walk over the days map.
+    """
+    return index.heat_matrix(today, window_days)
+
+
+class MatrixView:
+    """Persistent imshow figure embedded in a Tk container.
+
+    Subclasses compute a matrix and a layout key; the figure is rebuilt only
+    when the key changes, otherwise the image data is swapped in place.
+    """
+
+    title = ""
+    cbar_label = "sessions"
+
+    def __init__(self, master):
+        self.master = master
+        self.fig = None
+        self.canvas = None
+        self._im = None
+        self._key = None   # layout the current figure was built for
+
+    def _show(self, matrix, key):
+        vmax = max(1, float(matrix.max())) if matrix.size else 1
+        if self._key != key:
+            self._build(matrix, vmax)
+            self._key = key
+            return
+        self._im.set_data(matrix)
+        self._im.set_clim(0, vmax)
+        self.canvas.draw_idle()
+
+    def _figsize(self, matrix):
+        return max(6, matrix.shape[1] * 0.35), 2.8  # scale width by columns
+
+    def _decorate(self, ax, matrix):
+        ax.set_xticks([])
+
+    def _build(self, matrix, vmax):
+        self.destroy()
+        # A bare Figure (not pyplot) so nothing keeps old figures alive
+        fig = Figure(figsize=self._figsize(matrix), dpi=100)
+        ax = fig.add_subplot(111)
+        im = ax.imshow(matrix, aspect="auto", interpolation="none", cmap="Greens", origin="upper",
+                       vmin=0, vmax=vmax)
+        self._decorate(ax, matrix)
+        ax.set_title(self.title, fontsize=10)
+        ax.grid(False)
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+        cbar = fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
+        cbar.ax.set_ylabel(self.cbar_label, rotation=270, labelpad=10)
+
+        self.fig = fig
+        self._im = im
+        self.canvas = self._make_canvas(fig)
+        self.canvas.draw()
+
+    def _make_canvas(self, fig):
+        # Headless users (benchmarks, reports) override this with an Agg canvas,
+        # so Tk is only imported here
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        canvas = FigureCanvasTkAgg(fig, master=self.master)
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+        return canvas
+
+    def destroy(self):
+        if self.canvas is not None and hasattr(self.canvas, "get_tk_widget"):
+            self.canvas.get_tk_widget().destroy()
+        if self.fig is not None:
+            self.fig.clear()
+        self.fig = self.canvas = self._im = None
+        self._key = None
+
+
+class HeatmapView(MatrixView):
+    """Focus sessions per day over the last `window_days`, Mon..Sun rows."""
+
+    def __init__(self, master, window_days: int = WINDOW_DAYS):
+        super().__init__(master)
+        self.window_days = window_days
+        self.title = f"Focus sessions / day (last {window_days} days)"
+
+    def update(self, index, today: dt.date = None):
+        today = today or dt.date.today()
+        _, first_monday, weeks = heat_window(today, self.window_days)
+        self._show(build_heat_matrix(index, today, self.window_days), (first_monday, weeks))
+
+    def _decorate(self, ax, matrix):
+        ax.set_yticks(range(7))
+        ax.set_yticklabels(WEEKDAY_LABELS, fontsize=8)
+        ax.set_xticks([])
+
+
+def hour_weekday_matrix(db, start: dt.date = None, end: dt.date = None):
+    """7 x 24 focused minutes by weekday and hour from a SessionDB."""
+    return np.asarray(db.hour_weekday_minutes(start, end), dtype=float)
+
+
+def calendar_matrix(daily: dict, first_year: int, last_year: int):
+    """years x 53 matrix of sessions per week-of-year from {ordinal: sessions}."""
+    years = last_year - first_year + 1
+    out = np.zeros((years, 53), dtype=float)
+    if not daily:
+        return out
+    ords = np.fromiter(daily.keys(), dtype=np.int64, count=len(daily))
+    vals = np.fromiter(daily.values(), dtype=float, count=len(daily))
+    year = (ords - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[Y]").astype(np.int64) + 1970
+    jan1 = (year - 1970).astype("datetime64[Y]").astype("datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+    ok = (year >= first_year) & (year <= last_year)
+    np.add.at(out, (year[ok] - first_year, np.minimum((ords[ok] - jan1[ok]) // 7, 52)), vals[ok])
+    return out
+
+
+class HourWeekdayView(MatrixView):
+    """When in the week focus time happens (all recorded history)."""
+
+    title = "Focused minutes by weekday and hour"
+    cbar_label = "minutes"
+
+    def update(self, db):
+        self._show(hour_weekday_matrix(db), "hour-weekday")
+
+    def _figsize(self, matrix):
+        return 7.5, 2.8
+
+    def _decorate(self, ax, matrix):
+        ax.set_yticks(range(7))
+        ax.set_yticklabels(WEEKDAY_LABELS, fontsize=8)
+        ax.set_xticks(range(0, 24, 3))
+        ax.set_xticklabels([f"{h:02d}h" for h in range(0, 24, 3)], fontsize=8)
+
+
+class CalendarView(MatrixView):
+    """Focus sessions per week for every year on record."""
+
+    title = "Focus sessions / week, by year"
+
+    def update(self, db, today: dt.date = None):
+        today = today or dt.date.today()
+        first = db.first_day() or today
+        daily = db.daily_sessions(dt.date(first.year, 1, 1), today)
+        self._years = (first.year, today.year)
+        self._show(calendar_matrix(daily, first.year, today.year), (first.year, today.year))
+
+    def _figsize(self, matrix):
+        return 7.5, max(1.6, 0.45 * matrix.shape[0] + 1.0)
+
+    def _decorate(self, ax, matrix):
+        first_year = self._years[0]
+        ax.set_yticks(range(matrix.shape[0]))
+        ax.set_yticklabels([str(first_year + i) for i in range(matrix.shape[0])], fontsize=8)
+        ax.set_xticks([0, 13, 26, 39])
+        ax.set_xticklabels(["Jan", "Apr", "Jul", "Oct"], fontsize=8)
@@ -0,0 +1,270 @@
+"""Bulk import/export of the `days` history as CSV or JSON lines.
+
+    python history_io.py import other_tracker.csv
+    python history_io.py import sessions.jsonl --strict
+    python history_io.py export history.csv --from 2024-01-01 --to 2024-12-31
+    python history_io.py export - --format jsonl | jq .
+
+Imports stream the file in fixed-size chunks and keep only per-day totals
+in memory (bounded by the number of distinct days, not rows). Rows need a
+`date` (YYYY-MM-DD) or `start` (ISO datetime) column; `sessions` /
+`focus_sessions` default to 1 and `minutes` (or `duration_min`,
+`duration_secs`) to 0, so both per-day totals and one-row-per-session logs
+work. The merged totals land in data.json as a single journal record, and
+in sessions.db (if it exists) as imported day totals.
+
+Run this while the app is closed: both write the same journal, so an
+import fails (StoreLocked) while the app holds data.json.
+"""
+import argparse
+import csv
+import datetime as dt
+import itertools
+import json
+import os
+import sys
+import time
+
+from storage import DataStore
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(HERE, "data.json")
+SESSIONS_DB = os.path.join(HERE, "sessions.db")
+
+CHUNK_ROWS = 65536
+MAX_ERRORS_KEPT = 20
+DATE_KEYS = ("date", "day", "start")
+SESSION_KEYS = ("sessions", "focus_sessions")
+MINUTE_KEYS = ("minutes", "duration_min")
+SECOND_KEYS = ("duration_secs", "seconds")
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl"}
+
+
+def guess_format(path: str, fmt: str = None) -> str:
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"can't tell the format of {path!r}; pass --format csv|jsonl")
+    return FORMATS[ext]
+
+
+def _chunks(it, n: int):
+    it = iter(it)
+    while True:
+        chunk = list(itertools.islice(it, n))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _first(keys, names):
+    for name in names:
+        if name in keys:
+            return name
+    return None
+
+
+class _Merger:
+    """Validates (line, date, sessions, minutes, secs) rows and sums them per day."""
+
+    def __init__(self):
+        self.deltas = {}          # ISO date -> [sessions, minutes]
+        self.rows = 0
+        self.bad = 0
+        self.errors = []          # first few (line, message)
+        self._dates = {}          # raw date prefix -> ISO date (validated once)
+
+    def _date(self, raw) -> str:
+        key = str(raw).strip()[:10]
+        iso = self._dates.get(key)
+        if iso is None:
+            iso = self._dates[key] = dt.date.fromisoformat(key).isoformat()
+        return iso
+
+    def add_chunk(self, rows):
+        deltas, date_of = self.deltas, self._date
+        for line, raw_date, raw_sessions, raw_minutes, raw_secs in rows:
+            self.rows += 1
+            try:
+                if isinstance(raw_date, ValueError):
+                    raise raw_date
+                if raw_date in (None, ""):
+                    raise ValueError("missing date")
+                day = date_of(raw_date)
+                sessions = int(raw_sessions) if raw_sessions not in (None, "") else 1
+                if raw_minutes not in (None, ""):
+                    minutes = float(raw_minutes)
+                elif raw_secs not in (None, ""):
+                    minutes = float(raw_secs) / 60.0
+                else:
+                    minutes = 0.0
+                if sessions < 0 or minutes < 0:
+                    raise ValueError("negative value")
+            except (TypeError, ValueError) as e:
+                self.bad += 1
+                if len(self.errors) < MAX_ERRORS_KEPT:
+                    self.errors.append((line, str(e)))
+                continue
+            acc = deltas.get(day)
+            if acc is None:
+                deltas[day] = [sessions, minutes]
+            else:
+                acc[0] += sessions
+                acc[1] += minutes
+
+
+def _csv_rows(f):
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    cols = {name.strip().lower(): i for i, name in enumerate(header)}
+    date_col = _first(cols, DATE_KEYS)
+    if date_col is None:
+        raise ValueError(f"CSV header needs one of {', '.join(DATE_KEYS)}; got {header}")
+    idx = [cols[date_col]] + [cols.get(_first(cols, keys)) for keys in (SESSION_KEYS, MINUTE_KEYS, SECOND_KEYS)]
+    width = max(i for i in idx if i is not None) + 1
+    for line, row in enumerate(reader, start=2):
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+        yield (line, *(row[i] if i is not None else None for i in idx))
+
+
+def _jsonl_rows(f):
+    for line, raw in enumerate(f, start=1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            rec = json.loads(raw)
+            if not isinstance(rec, dict):
+                raise ValueError("not an object")
+        except ValueError as e:
+            yield (line, e, None, None, None)  # reported as a bad row
+            continue
+        yield (line, rec.get(_first(rec, DATE_KEYS)), rec.get(_first(rec, SESSION_KEYS)),
+               rec.get(_first(rec, MINUTE_KEYS)), rec.get(_first(rec, SECOND_KEYS)))
+
+
+def read_history(path: str, fmt: str = None, chunk_rows: int = CHUNK_ROWS) -> _Merger:
+    """Stream `path` and return the per-day totals it contains."""
+    fmt = guess_format(path, fmt)
+    merger = _Merger()
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = _csv_rows(f) if fmt == "csv" else _jsonl_rows(f)
+        for chunk in _chunks(rows, chunk_rows):
+            merger.add_chunk(chunk)
+    return merger
+
+
+def import_history(path: str, data_path: str = DATA_FILE, db_path: str = SESSIONS_DB,
+                   fmt: str = None, strict: bool = False, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """Merge a CSV/JSONL history file into data.json (and sessions.db)."""
+    t = time.perf_counter()
+    store = DataStore(data_path)
+    store.load()   # takes the writer lock first: fail before reading a big file if the app is open
+    try:
+        merger = read_history(path, fmt, chunk_rows)
+        if strict and merger.bad:
+            raise ValueError(f"{merger.bad} invalid rows (first: line {merger.errors[0][0]}: {merger.errors[0][1]})")
+        deltas = {day: [s, int(round(m))] for day, (s, m) in sorted(merger.deltas.items())}
+        store.merge_days(deltas)   # one journal record, folded into the snapshot on close
+    finally:
+        store.close()
+
+    if deltas and db_path and os.path.exists(db_path):
+        from sessions_db import SessionDB
+        db = SessionDB(db_path)
+        days_map = {day: {"focus_sessions": s, "minutes": m} for day, (s, m) in deltas.items()}
+        db.import_days_once(days_map, marker=f"import:{os.path.basename(path)}:{time.time():.6f}")
+        db.close()
+
+    secs = time.perf_counter() - t
+    size = os.path.getsize(path)
+    return {"rows": merger.rows, "imported": merger.rows - merger.bad, "bad": merger.bad,
+            "errors": merger.errors, "days": len(deltas),
+            "sessions": sum(s for s, _ in deltas.values()), "minutes": sum(m for _, m in deltas.values()),
+            "secs": secs, "rows_per_sec": merger.rows / secs if secs else 0.0,
+            "mb_per_sec": size / (1024 * 1024) / secs if secs else 0.0}
+
+
+def export_history(days: dict, out, fmt: str = "csv", start: dt.date = None, end: dt.date = None) -> int:
+    """Write days in [start, end] (inclusive) to the text stream `out`; return the row count."""
+    lo = start.isoformat() if start else ""
+    hi = end.isoformat() if end else "9999-99-99"
+    writer = csv.writer(out, lineterminator="\n") if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(("date", "focus_sessions", "minutes"))
+    n = 0
+    for day in sorted(days):   # ISO dates sort chronologically as strings
+        if not lo <= day <= hi:
+            continue
+        rec = days[day]
+        sessions, minutes = int(rec.get("focus_sessions", 0)), int(rec.get("minutes", 0))
+        if writer is not None:
+            writer.writerow((day, sessions, minutes))
+        else:
+            out.write(json.dumps({"date": day, "focus_sessions": sessions, "minutes": minutes}) + "\n")
+        n += 1
+    return n
+
+
+# ----------------- CLI -----------------
+def _cmd_import(args):
+    try:
+        rep = import_history(args.file, args.data, args.db, args.format, args.strict, args.chunk)
+    except (OSError, ValueError) as e:
+        print("[Import] Failed:", e)
+        return 1
+    for line, msg in rep["errors"]:
+        print(f"[Import] line {line}: {msg}")
+    if rep["bad"] > len(rep["errors"]):
+        print(f"[Import] ... {rep['bad'] - len(rep['errors'])} more invalid rows")
+    print(f"[Import] {rep['imported']}/{rep['rows']} rows -> {rep['days']} days "
+          f"({rep['sessions']} sessions, {rep['minutes']} min) in {rep['secs']:.2f}s "
+          f"[{rep['rows_per_sec']:,.0f} rows/s, {rep['mb_per_sec']:.1f} MB/s]")
+    return 0
+
+
+def _cmd_export(args):
+    store = DataStore(args.data)
+    store.load(compact=False)  # read-only: never rewrite data.json, journal or archives
+    days = store.days_between(args.start, args.end)  # only the archived years in range are read
+    fmt = args.format or ("csv" if args.file == "-" else guess_format(args.file))
+    t = time.perf_counter()
+    if args.file == "-":
+        n = export_history(days, sys.stdout, fmt, args.start, args.end)
+    else:
+        with open(args.file, "w", encoding="utf-8", newline="") as f:
+            n = export_history(days, f, fmt, args.start, args.end)
+    print(f"[Export] {n} days in {time.perf_counter() - t:.2f}s", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Import/export Pomodoro history (CSV or JSON lines).")
+    ap.add_argument("--data", default=DATA_FILE, help="data.json to read/update")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    imp = sub.add_parser("import", help="merge a history file into data.json")
+    imp.add_argument("file")
+    imp.add_argument("--format", choices=("csv", "jsonl"))
+    imp.add_argument("--db", default=SESSIONS_DB, help="sessions.db to update if it exists ('' to skip)")
+    imp.add_argument("--strict", action="store_true", help="write nothing if any row is invalid")
+    imp.add_argument("--chunk", type=int, default=CHUNK_ROWS, help="rows validated per chunk")
+    imp.set_defaults(func=_cmd_import)
+
+    exp = sub.add_parser("export", help="write the days history ('-' for stdout)")
+    exp.add_argument("file")
+    exp.add_argument("--format", choices=("csv", "jsonl"))
+    exp.add_argument("--from", dest="start", type=dt.date.fromisoformat, help="first day (YYYY-MM-DD)")
+    exp.add_argument("--to", dest="end", type=dt.date.fromisoformat, help="last day (YYYY-MM-DD)")
+    exp.set_defaults(func=_cmd_export)
+
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""Main-thread responsiveness monitoring.
+
+`PERF` times every Tk callback (commands, bindings, `after` callbacks)
+through a hook on tkinter's CallWrapper, plus named spans the app wraps
+around phase-transition steps. While enabled, a lag probe measures how
+late `after` timers fire. Everything is kept in rolling windows and can be
+shown in `PerfPanel` or dumped to JSON.
+
+The hook is installed once at startup and costs one flag check per
+callback while disabled; the lag probe only runs while enabled.
+"""
+import json
+import time
+import tkinter as tk
+from collections import deque
+from contextlib import contextmanager
+from tkinter import ttk
+
+LAG = "loop lag"
+_LAG_FIRE = "after:_lag_probe_fire"
+# log2 buckets in ms: <1, 1-2, 2-4, ... 512-1024, >=1024
+BUCKETS = [0.0] + [float(2 ** i) for i in range(11)]
+
+
+def _bucket_labels():
+    labels = []
+    for lo, hi in zip(BUCKETS, BUCKETS[1:] + [None]):
+        labels.append(f"<{hi:g}ms" if lo == 0 else (f"{lo:g}-{hi:g}ms" if hi else f">={lo:g}ms"))
+    return labels
+
+
+class _Series:
+    __slots__ = ("window", "count", "max")
+
+    def __init__(self, size):
+        self.window = deque(maxlen=size)   # recent durations, ms
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.window.append(ms)
+        self.count += 1
+        if ms > self.max:
+            self.max = ms
+
+    def summary(self):
+        s = sorted(self.window)
+        if not s:
+            return {"n": self.count}
+
+        def pct(p):
+            return s[min(len(s) - 1, int(p / 100.0 * len(s)))]
+        hist = [0] * len(BUCKETS)
+        for ms in s:
+            i = 0
+            while i + 1 < len(BUCKETS) and ms >= BUCKETS[i + 1]:
+                i += 1
+            hist[i] += 1
+        return {"n": self.count, "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+                "max_ms": self.max, "hist": dict(zip(_bucket_labels(), hist))}
+
+
+class Instrument:
+    def __init__(self, window: int = 2048, lag_interval_ms: int = 100):
+        self.enabled = False
+        self.window = window
+        self.lag_interval_ms = lag_interval_ms
+        self.series = {}
+        self._root = None
+        self._lag_id = None
+        self._lag_due = None
+
+    # ----------------- Recording -----------------
+    def record(self, name: str, secs: float):
+        s = self.series.get(name)
+        if s is None:
+            s = self.series[name] = _Series(self.window)
+        s.add(secs * 1000.0)
+
+    @contextmanager
+    def _span(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t)
+
+    def span(self, name: str):
+        """Context manager timing a named step (no-op while disabled)."""
+        return self._span(name) if self.enabled else _NULL
+
+    # ----------------- On/off -----------------
+    def enable(self, root):
+        self._root = root
+        if self.enabled:
+            return
+        self.enabled = True
+        self._schedule_lag_probe()
+
+    def disable(self):
+        self.enabled = False
+        if self._lag_id is not None and self._root is not None:
+            try:
+                self._root.after_cancel(self._lag_id)
+            except tk.TclError:
+                pass
+        self._lag_id = None
+
+    def _schedule_lag_probe(self):
+        self._lag_due = time.perf_counter() + self.lag_interval_ms / 1000.0
+        self._lag_id = self._root.after(self.lag_interval_ms, self._lag_probe_fire)
+
+    def _lag_probe_fire(self):
+        self._lag_id = None
+        if not self.enabled:
+            return
+        self.record(LAG, max(0.0, time.perf_counter() - self._lag_due))
+        self._schedule_lag_probe()
+
+    # ----------------- Output -----------------
+    def snapshot(self) -> dict:
+        return {name: s.summary() for name, s in sorted(self.series.items())}
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "series": self.snapshot()}, f, indent=2)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+PERF = Instrument()
+
+
+def _label(func) -> str:
+    qual = getattr(func, "__qualname__", None) or type(func).__name__
+    if qual.endswith("<locals>.callit"):
+        # Misc.after() wraps callbacks in `callit` but copies the real name over
+        return "after:" + getattr(func, "__name__", "?")
+    return qual
+
+
+def install_tk_hooks(perf: Instrument = PERF):
+    """Time every Tk -> Python callback while `perf.enabled` is set."""
+    if getattr(tk.CallWrapper, "_perf_hooked", False):
+        return
+    orig_call = tk.CallWrapper.__call__
+
+    def __call__(self, *args):
+        if not perf.enabled:
+            return orig_call(self, *args)
+        label = self.__dict__.get("_perf_label")
+        if label is None:
+            label = self._perf_label = _label(self.func)
+        t = time.perf_counter()
+        try:
+            return orig_call(self, *args)
+        finally:
+            if label != _LAG_FIRE:
+                perf.record(label, time.perf_counter() - t)
+
+    tk.CallWrapper.__call__ = __call__
+    tk.CallWrapper._perf_hooked = True
+
+
+class PerfPanel:
+    """Hidden debug window listing callback timings and a lag histogram."""
+
+    def __init__(self, root, perf: Instrument = PERF, refresh_ms: int = 1000):
+        self.root = root
+        self.perf = perf
+        self.refresh_ms = refresh_ms
+        self._after_id = None
+        self.win = tk.Toplevel(root)
+        self.win.title("Performance")
+        self.win.geometry("620x420")
+        self.win.protocol("WM_DELETE_WINDOW", self.hide)
+
+        top = ttk.Frame(self.win, padding=6)
+        top.pack(fill="x")
+        self.enabled_var = tk.BooleanVar(value=perf.enabled)
+        ttk.Checkbutton(top, text="Instrumentation on", variable=self.enabled_var,
+                        command=self._toggle).pack(side="left")
+
+        cols = ("n", "p50", "p95", "max")
+        self.tree = ttk.Treeview(self.win, columns=cols, height=10)
+        self.tree.heading("#0", text="callback / step")
+        self.tree.column("#0", width=300)
+        for c in cols:
+            self.tree.heading(c, text=c if c == "n" else f"{c} ms")
+            self.tree.column(c, width=70, anchor="e")
+        self.tree.pack(fill="both", expand=True, padx=6)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self._refresh_hist())
+
+        self.hist = tk.Text(self.win, height=8, font=("Courier", 9), state="disabled")
+        self.hist.pack(fill="x", padx=6, pady=6)
+
+    def _toggle(self):
+        if self.enabled_var.get():
+            self.perf.enable(self.root)
+        else:
+            self.perf.disable()
+
+    def show(self):
+        self.win.deiconify()
+        self.win.lift()
+        self._refresh()
+
+    def hide(self):
+        self.win.withdraw()
+        if self._after_id is not None:
+            self.win.after_cancel(self._after_id)
+            self._after_id = None
+
+    def toggle(self):
+        if self.win.state() == "withdrawn":
+            self.show()
+        else:
+            self.hide()
+
+    def _refresh(self):
+        self._after_id = None
+        snap = self.perf.snapshot()
+        for name, s in snap.items():
+            vals = (s["n"], f"{s.get('p50_ms', 0):.1f}", f"{s.get('p95_ms', 0):.1f}", f"{s.get('max_ms', 0):.1f}")
+            if self.tree.exists(name):
+                self.tree.item(name, values=vals)
+            else:
+                self.tree.insert("", "end", iid=name, text=name, values=vals)
+        self._refresh_hist(snap)
+        self._after_id = self.win.after(self.refresh_ms, self._refresh)
+
+    def _refresh_hist(self, snap=None):
+        snap = snap if snap is not None else self.perf.snapshot()
+        sel = self.tree.selection()
+        name = sel[0] if sel else LAG
+        hist = snap.get(name, {}).get("hist", {})
+        peak = max(hist.values()) if hist else 0
+        lines = [f"{name} (last {self.perf.window})"]
+        for label, n in hist.items():
+            bar = "#" * (int(40 * n / peak) if peak else 0)
+            lines.append(f"{label:>12} {n:6d} {bar}")
+        self.hist.config(state="normal")
+        self.hist.delete("1.0", "end")
+        self.hist.insert("end", "\n".join(lines))
+        self.hist.config(state="disabled")
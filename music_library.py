@@ -0,0 +1,292 @@
+"""Indexed music library with cached metadata and incremental rescans.
+
+The folder is scanned recursively with os.scandir on a worker thread.
+Each track's size, mtime, duration and tags are cached in a JSON index
+together with every directory's mtime. On later starts the cached index
+is usable immediately, and the rescan only lists directories whose mtime
+changed (adding/removing/renaming a file changes its directory's mtime).
+Files in unchanged directories are still stat()ed, since overwriting a
+file in place leaves its directory's mtime alone; only files whose size
+or mtime moved are probed again.
+
+Durations and tags come from `mutagen` when it is installed; without it
+tracks are still indexed without tags, and a duration is filled in the
+first time the track is decoded (loudness analysis, or the player via
+`set_duration`), so each file version is decoded for it at most once.
+
+Each track's loudness (loudness.py) is measured once in a process pool
+and stored in its index record, so it is kept for as long as the file's
+size and mtime don't change and re-measured when they do.
+"""
+import concurrent.futures as cf
+import json
+import multiprocessing as mp
+import os
+import threading
+import time
+
+from storage import atomic_write_json
+
+try:
+    import mutagen  # optional: durations and tags
+except Exception:
+    mutagen = None
+
+AUDIO_EXTS = (".mp3", ".ogg", ".wav", ".flac")
+INDEX_VERSION = 1
+
+
+def read_metadata(path: str):
+    """(duration_secs or None, tags dict) for one file."""
+    if mutagen is None:
+        return None, {}
+    try:
+        f = mutagen.File(path, easy=True)
+    except Exception:
+        return None, {}
+    if f is None:
+        return None, {}
+    duration = getattr(getattr(f, "info", None), "length", None)
+    tags = {}
+    for key in ("title", "artist", "album"):
+        try:
+            val = f.tags.get(key) if f.tags else None
+        except Exception:
+            val = None
+        if val:
+            tags[key] = val[0] if isinstance(val, list) else str(val)
+    return duration, tags
+
+
+class MusicLibrary:
+    """Track index for one music folder, persisted to `index_path`."""
+
+    def __init__(self, folder: str, index_path: str, exts=AUDIO_EXTS):
+        self.folder = os.path.abspath(folder)
+        self.index_path = index_path
+        self.exts = tuple(e.lower() for e in exts)
+        self._lock = threading.Lock()
+        self._dirs = {}      # rel dir -> {"mtime": ns, "files": [rel paths], "subdirs": [rel dirs]}
+        self._tracks = {}    # rel path -> {"size", "mtime", "duration", "tags"}
+        self._scan_thread = None
+        self.scanned = threading.Event()   # set once a rescan has finished this run
+        self.last_scan = {}                # stats of the last rescan
+        self._analysis_thread = None
+        self._analysis_pool = None
+        self._analysis_stop = threading.Event()
+        self.last_analysis = {}            # stats of the last loudness pass
+
+    # ----------------- Index file -----------------
+    def load_index(self) -> bool:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                idx = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if idx.get("version") != INDEX_VERSION or idx.get("root") != self.folder:
+            return False
+        with self._lock:
+            self._dirs = idx.get("dirs", {})
+            self._tracks = idx.get("tracks", {})
+        return True
+
+    def _save_index(self):
+        with self._lock:
+            idx = {"version": INDEX_VERSION, "root": self.folder, "dirs": self._dirs, "tracks": self._tracks}
+            try:
+                atomic_write_json(self.index_path, idx, separators=(",", ":"))
+            except OSError as e:
+                print("[Music] Could not write index:", e)
+
+    # ----------------- Queries -----------------
+    def tracks(self):
+        """Absolute paths of all indexed tracks, sorted."""
+        with self._lock:
+            rels = sorted(self._tracks)
+        return [os.path.join(self.folder, r) for r in rels]
+
+    def duration(self, path: str):
+        rel = os.path.relpath(path, self.folder)
+        rec = self._tracks.get(rel)
+        return rec.get("duration") if rec else None
+
+    def set_duration(self, path: str, secs: float):
+        """Record a duration measured by decoding `path` (no mutagen) and save the index."""
+        rel = os.path.relpath(path, self.folder)
+        with self._lock:
+            rec = self._tracks.get(rel)
+            if rec is None or rec.get("duration") is not None:
+                return
+            rec["duration"] = secs  # dropped with the record once size or mtime change
+        self._save_index()
+
+    def loudness(self, path: str):
+        """Cached loudness.analyse_file result for `path`, or None if not measured yet."""
+        rel = os.path.relpath(path, self.folder)
+        rec = self._tracks.get(rel)
+        return rec.get("loudness") if rec else None
+
+    # ----------------- Scanning -----------------
+    def rescan_async(self, on_done=None):
+        if self._scan_thread is not None and self._scan_thread.is_alive():
+            return
+        self._scan_thread = threading.Thread(target=self._rescan_quietly, args=(on_done,), daemon=True)
+        self._scan_thread.start()
+
+    def _rescan_quietly(self, on_done):
+        try:
+            changed = self.rescan()
+        except Exception as e:
+            print("[Music] Rescan failed:", e)
+            changed = False
+        self.scanned.set()
+        if on_done is not None:
+            on_done(changed)
+
+    def rescan(self) -> bool:
+        """Bring the index up to date; return True if the track set changed."""
+        t = time.perf_counter()
+        old_dirs, old_tracks = self._dirs, self._tracks
+        new_dirs, new_tracks = {}, {}
+        stats = {"dirs": 0, "dirs_listed": 0, "files_probed": 0}
+        if os.path.isdir(self.folder):
+            self._walk("", old_dirs, old_tracks, new_dirs, new_tracks, stats)
+        changed = set(new_tracks) != set(old_tracks) or stats["files_probed"] > 0
+        with self._lock:
+            self._dirs, self._tracks = new_dirs, new_tracks
+        if changed or new_dirs != old_dirs:
+            self._save_index()
+        stats["secs"] = time.perf_counter() - t
+        stats["tracks"] = len(new_tracks)
+        self.last_scan = stats
+        return changed
+
+    def _track(self, frel, st, old_tracks, new_tracks, stats):
+        """Reuse the cached record (and its loudness) unless size or mtime changed."""
+        prev = old_tracks.get(frel)
+        if prev and prev["size"] == st.st_size and prev["mtime"] == st.st_mtime_ns:
+            new_tracks[frel] = prev
+            return
+        stats["files_probed"] += 1
+        duration, tags = read_metadata(os.path.join(self.folder, frel))
+        new_tracks[frel] = {"size": st.st_size, "mtime": st.st_mtime_ns, "duration": duration, "tags": tags}
+
+    def _walk(self, rel, old_dirs, old_tracks, new_dirs, new_tracks, stats):
+        path = os.path.join(self.folder, rel) if rel else self.folder
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        stats["dirs"] += 1
+        cached = old_dirs.get(rel)
+        if cached is not None and cached["mtime"] == mtime:
+            # Directory listing unchanged: reuse it, only descend into subdirs
+            new_dirs[rel] = cached
+            for f in cached["files"]:
+                try:
+                    st = os.stat(os.path.join(self.folder, f))
+                except OSError:
+                    continue
+                self._track(f, st, old_tracks, new_tracks, stats)
+            for sub in cached["subdirs"]:
+                self._walk(sub, old_dirs, old_tracks, new_dirs, new_tracks, stats)
+            return
+
+        stats["dirs_listed"] += 1
+        files, subdirs = [], []
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            return
+        for e in entries:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    subdirs.append(os.path.join(rel, e.name) if rel else e.name)
+                    continue
+                if not e.name.lower().endswith(self.exts):
+                    continue
+                st = e.stat()
+            except OSError:
+                continue
+            frel = os.path.join(rel, e.name) if rel else e.name
+            files.append(frel)
+            self._track(frel, st, old_tracks, new_tracks, stats)
+        new_dirs[rel] = {"mtime": mtime, "files": files, "subdirs": subdirs}
+        for sub in subdirs:
+            self._walk(sub, old_dirs, old_tracks, new_dirs, new_tracks, stats)
+
+    # ----------------- Loudness -----------------
+    def analyse_async(self, jobs: int = None, on_result=None):
+        """Measure tracks without a cached loudness, off the calling thread."""
+        if self._analysis_thread is not None and self._analysis_thread.is_alive():
+            return
+        self._analysis_stop.clear()
+        self._analysis_thread = threading.Thread(target=self._analyse_quietly, args=(jobs, on_result),
+                                                 name="loudness", daemon=True)
+        self._analysis_thread.start()
+
+    def _analyse_quietly(self, jobs, on_result):
+        try:
+            self.analyse(jobs, on_result)
+        except Exception as e:
+            print("[Music] Loudness analysis failed:", e)
+
+    def analyse(self, jobs: int = None, on_result=None, save_every: int = 50) -> dict:
+        """Measure every track lacking a loudness entry in worker processes.
+
+        Results are written into the track records (and the index every
+        `save_every` tracks), so an interrupted pass resumes where it stopped.
+        Files that can't be decoded are recorded too and not retried until
+        they change. Workers are spawned, so a frozen executable's entry
+        point must call multiprocessing.freeze_support() first (app.py does).
+        """
+        with self._lock:
+            todo = [(rel, rec) for rel, rec in self._tracks.items() if "loudness" not in rec]
+        stats = {"tracks": len(todo), "analysed": 0, "failed": 0, "secs": 0.0}
+        self.last_analysis = stats
+        if not todo:
+            return stats
+        from loudness import analyse_file, init_worker  # numpy only when there is work
+
+        t = time.perf_counter()
+        jobs = jobs or max(1, (os.cpu_count() or 2) // 2)
+        # Spawned, not forked: the app process runs Tk, SDL and an initialised mixer
+        pool = self._analysis_pool = cf.ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                                            mp_context=mp.get_context("spawn"))
+        try:
+            futures = {pool.submit(analyse_file, os.path.join(self.folder, rel)): (rel, rec) for rel, rec in todo}
+            for n, fut in enumerate(cf.as_completed(futures), 1):
+                if self._analysis_stop.is_set():
+                    break
+                rel, rec = futures[fut]
+                try:
+                    res = fut.result()
+                    stats["analysed"] += 1
+                except cf.process.BrokenProcessPool as e:
+                    print("[Music] Loudness workers died:", e)  # not the files' fault; retried next run
+                    break
+                except Exception as e:
+                    res = {"lufs": None, "error": str(e)[:200]}
+                    stats["failed"] += 1
+                with self._lock:
+                    rec["loudness"] = res  # a changed file has a new record by now; this one is dropped
+                    if rec.get("duration") is None and res.get("duration"):
+                        rec["duration"] = res["duration"]  # no mutagen: the decode measured it
+                if on_result is not None:
+                    on_result(os.path.join(self.folder, rel), res)
+                if n % save_every == 0:
+                    self._save_index()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._analysis_pool = None
+        self._save_index()
+        stats["secs"] = time.perf_counter() - t
+        return stats
+
+    def stop_analysis(self):
+        """Drop queued analyses; tracks already being decoded finish on their own."""
+        self._analysis_stop.set()
+        pool = self._analysis_pool
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
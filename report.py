@@ -0,0 +1,201 @@
+"""Headless heatmap report for many data.json files.
+
+    python report.py team/*/data.json --out weekly/
+    python report.py team/ --format svg --jobs 8 --today 2024-06-30
+
+Each file is rendered with the Stats tab's own code (StatsIndex +
+heatmap.HeatmapView) on a matplotlib Agg canvas, in a ProcessPoolExecutor.
+Every worker builds its figure once and, for the following files, only
+swaps the image data and title (the layout is the same for all files of
+one report, since they share `today` and the window). A summary CSV with
+per-file totals, streaks and timings is written next to the images.
+
+Input files are only read: the history is loaded without compaction, so
+journals and archives are left as they are.
+"""
+import argparse
+import concurrent.futures as cf
+import csv
+import datetime as dt
+import os
+import sys
+import time
+
+from storage import DataStore
+
+FORMATS = ("png", "svg")
+SUMMARY_FIELDS = ("file", "image", "days", "sessions", "minutes", "window_sessions", "window_minutes",
+                  "week_sessions", "current_streak", "longest_streak", "best_day", "best_day_sessions",
+                  "load_ms", "render_ms", "error")
+
+_VIEW = None   # per-process HeatmapView on an Agg canvas, reused between files
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _view(window_days: int):
+    global _VIEW
+    if _VIEW is None or _VIEW.window_days != window_days:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        import heatmap
+
+        class _Canvas(FigureCanvasAgg):
+            def draw_idle(self, *args, **kwargs):
+                pass  # savefig renders; there is no screen to refresh
+
+        class ReportHeatmap(heatmap.HeatmapView):
+            def _make_canvas(self, fig):
+                return _Canvas(fig)
+
+        _VIEW = ReportHeatmap(None, window_days)
+    return _VIEW
+
+
+def render_file(path: str, image_path: str, fmt: str, today: dt.date, window_days: int) -> dict:
+    """Render one file's heatmap to `image_path`; return its summary row."""
+    from stats_index import StatsIndex
+
+    row = {"file": path, "image": image_path, "error": ""}
+    t = time.perf_counter()
+    try:
+        store = DataStore(path)
+        store.load(compact=False)
+        index = StatsIndex.from_days(store.days_between(end=today), today)
+    except Exception as e:
+        row["error"] = f"load: {e}"
+        return row
+    row["load_ms"] = round((time.perf_counter() - t) * 1000, 2)
+
+    start = today - dt.timedelta(days=window_days - 1)
+    first = dt.date.fromordinal(index.origin)
+    row["sessions"], row["minutes"] = index.total(first, today)
+    row["days"] = int((index.sessions[:index.size] > 0).sum())
+    row["window_sessions"], row["window_minutes"] = index.total(start, today)
+    row["week_sessions"] = index.total(today - dt.timedelta(days=today.weekday()), today)[0]
+    row["current_streak"] = index.current_streak(today)
+    row["longest_streak"] = index.longest_streak()
+    best = index.best_day()
+    row["best_day"], row["best_day_sessions"] = (best[0].isoformat(), best[1]) if best else ("", 0)
+
+    t = time.perf_counter()
+    try:
+        view = _view(window_days)
+        view.update(index, today)
+        view._im.axes.set_title(f"{_label(path)}: {view.title}", fontsize=10)
+        view.fig.savefig(image_path, format=fmt)
+    except Exception as e:
+        row["error"] = f"render: {e}"
+        return row
+    row["render_ms"] = round((time.perf_counter() - t) * 1000, 2)
+    return row
+
+
+def _label(path: str) -> str:
+    """Short name for titles: the file's folder for data.json, else the file name."""
+    name = os.path.basename(path)
+    if name == "data.json":
+        return os.path.basename(os.path.dirname(os.path.abspath(path))) or name
+    return os.path.splitext(name)[0]
+
+
+def find_inputs(args) -> list:
+    """Files from the arguments; folders are searched recursively for data.json."""
+    out = []
+    for arg in args:
+        if os.path.isdir(arg):
+            for dirpath, _, files in os.walk(arg):
+                out.extend(os.path.join(dirpath, f) for f in files if f == "data.json")
+        else:
+            out.append(arg)
+    return sorted(set(out))
+
+
+def image_names(paths: list, fmt: str) -> dict:
+    """Unique image file names: the path relative to the inputs' common folder."""
+    if not paths:
+        return {}
+    common = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+    names = {}
+    for p in paths:
+        rel = os.path.splitext(os.path.relpath(os.path.abspath(p), common))[0]
+        names[p] = rel.replace(os.sep, "__") + "." + fmt
+    return names
+
+
+def run(paths: list, out_dir: str, fmt: str = "png", jobs: int = None, today: dt.date = None,
+        window_days: int = 90, on_row=None) -> list:
+    """Render all `paths` into `out_dir`; rows come back in input order."""
+    today = today or dt.date.today()
+    os.makedirs(out_dir, exist_ok=True)
+    names = image_names(paths, fmt)
+    tasks = [(p, os.path.join(out_dir, names[p]), fmt, today, window_days) for p in paths]
+    rows = {}
+    if jobs == 1:
+        _init_worker()
+        for task in tasks:
+            rows[task[0]] = row = render_file(*task)
+            if on_row:
+                on_row(row)
+    else:
+        with cf.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+            futures = {pool.submit(render_file, *task): task[0] for task in tasks}
+            for fut in cf.as_completed(futures):
+                try:
+                    row = fut.result()
+                except Exception as e:  # worker died
+                    row = {"file": futures[fut], "image": "", "error": f"worker: {e}"}
+                rows[row["file"]] = row
+                if on_row:
+                    on_row(row)
+    return [rows[p] for p in paths]
+
+
+def write_summary(rows: list, path: str):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _print_row(row: dict):
+    if row.get("error"):
+        print(f"[Report] {row['file']}: FAILED ({row['error']})", flush=True)
+        return
+    print(f"[Report] {row['file']}: load {row['load_ms']:.1f} ms, render {row['render_ms']:.1f} ms "
+          f"-> {os.path.basename(row['image'])}", flush=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render Stats heatmaps for many data.json files.")
+    ap.add_argument("inputs", nargs="+", help="data.json files or folders to search")
+    ap.add_argument("--out", default="report", help="output folder (default: ./report)")
+    ap.add_argument("--format", choices=FORMATS, default="png")
+    ap.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count; 1 = in-process)")
+    ap.add_argument("--today", type=dt.date.fromisoformat, default=None, help="last day of the window (YYYY-MM-DD)")
+    ap.add_argument("--days", type=int, default=90, help="window length in days")
+    ap.add_argument("--summary", default=None, help="summary CSV (default: OUT/summary.csv)")
+    args = ap.parse_args(argv)
+
+    paths = find_inputs(args.inputs)
+    if not paths:
+        print("[Report] No input files")
+        return 1
+    jobs = args.jobs or os.cpu_count() or 1
+    t = time.perf_counter()
+    rows = run(paths, args.out, args.format, jobs, args.today, args.days, on_row=_print_row)
+    secs = time.perf_counter() - t
+    summary = args.summary or os.path.join(args.out, "summary.csv")
+    write_summary(rows, summary)
+    failed = sum(1 for r in rows if r.get("error"))
+    print(f"[Report] {len(rows) - failed}/{len(rows)} files in {secs:.2f}s with {jobs} worker(s) "
+          f"({len(rows) / secs:.1f} files/s); summary: {summary}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""Per-phase session log in SQLite, for time-of-day and multi-year stats.
+
+Every finished (or abandoned) phase becomes one row. Writes go through a
+single writer thread that batches inserts into one transaction; reads use
+their own connection (WAL lets both run at once). Rows carry their local
+day, weekday and hour, and a trigger keeps an hourly rollup table, so the
+Stats views are answered by small indexed aggregates.
+
+History that predates the database (the `days` map in data.json, which has
+per-day totals only) is imported once as one row per day with a NULL hour.
+"""
+import datetime as dt
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id           INTEGER PRIMARY KEY,
+    start_ts     REAL    NOT NULL,      -- unix seconds
+    end_ts       REAL    NOT NULL,
+    mode         TEXT    NOT NULL,      -- 'focus' | 'break'
+    planned_secs REAL    NOT NULL,
+    actual_secs  REAL    NOT NULL,
+    completed    INTEGER NOT NULL,      -- 0 = abandoned
+    sessions     INTEGER NOT NULL DEFAULT 1,
+    local_day    INTEGER NOT NULL,      -- date.toordinal() of start, local time
+    weekday      INTEGER NOT NULL,      -- 0=Mon..6=Sun
+    hour         INTEGER,               -- 0..23, NULL when unknown (imported totals)
+    source       TEXT    NOT NULL DEFAULT 'app'
+);
+CREATE INDEX IF NOT EXISTS ix_sessions_start ON sessions(start_ts);
+CREATE INDEX IF NOT EXISTS ix_sessions_mode_start ON sessions(mode, start_ts);
+
+-- Completed time rolled up per (mode, day, hour); kept by the trigger below
+-- so Stats queries touch at most 24 rows per day instead of every session.
+CREATE TABLE IF NOT EXISTS hourly (
+    mode      TEXT    NOT NULL,
+    local_day INTEGER NOT NULL,
+    hour      INTEGER NOT NULL,         -- -1 for imported day totals
+    weekday   INTEGER NOT NULL,
+    sessions  INTEGER NOT NULL,
+    secs      REAL    NOT NULL,
+    PRIMARY KEY (mode, local_day, hour)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS tr_sessions_hourly AFTER INSERT ON sessions
+WHEN NEW.completed = 1
+BEGIN
+    INSERT INTO hourly (mode, local_day, hour, weekday, sessions, secs)
+    VALUES (NEW.mode, NEW.local_day, COALESCE(NEW.hour, -1), NEW.weekday, NEW.sessions, NEW.actual_secs)
+    ON CONFLICT (mode, local_day, hour)
+    DO UPDATE SET sessions = sessions + excluded.sessions, secs = secs + excluded.secs;
+END;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_INSERT = ("INSERT INTO sessions (start_ts, end_ts, mode, planned_secs, actual_secs, completed,"
+           " sessions, local_day, weekday, hour, source) VALUES (?,?,?,?,?,?,?,?,?,?,?)")
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def session_row(start_ts: float, end_ts: float, mode: str, planned_secs: float,
+                actual_secs: float, completed: bool, sessions: int = 1, source: str = "app"):
+    local = dt.datetime.fromtimestamp(start_ts)
+    return (float(start_ts), float(end_ts), mode, float(planned_secs), float(actual_secs),
+            int(bool(completed)), int(sessions), local.date().toordinal(), local.weekday(),
+            local.hour, source)
+
+
+def day_rows(days_map: dict, source: str = "data.json"):
+    """Rows for per-day totals (no time of day) from a `days` map."""
+    for key, rec in days_map.items():
+        try:
+            day = dt.date.fromisoformat(key)
+        except (TypeError, ValueError):
+            continue
+        n = int(rec.get("focus_sessions", 0))
+        if n <= 0:
+            continue
+        secs = int(rec.get("minutes", 0)) * 60.0
+        ts = time.mktime(day.timetuple())
+        yield (ts, ts + secs, "focus", secs, secs, 1, n, day.toordinal(), day.weekday(), None, source)
+
+
+class SessionDB:
+    """Batched, background-written session log."""
+
+    def __init__(self, path: str, batch_size: int = 256, flush_secs: float = 1.0):
+        self.path = path
+        self.batch_size = int(batch_size)
+        self.flush_secs = float(flush_secs)
+        self._q = queue.Queue()
+        self._reader = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = _connect(path)
+        with conn:
+            conn.executescript(SCHEMA)
+        conn.close()
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    # ----------------- Writes -----------------
+    def record(self, *args, **kwargs):
+        """Queue one phase (see session_row); never blocks on disk."""
+        self._q.put(("row", session_row(*args, **kwargs)))
+
+    def import_days_once(self, days_map, marker: str = "imported:data.json"):
+        """Import a data.json `days` map the first time this DB sees it.
+
+        `days_map` may be a callable returning the map; it is then only
+        called (on the writer thread) if the import is actually needed.
+        """
+        self._q.put(("import", (days_map if callable(days_map) else dict(days_map), marker)))
+
+    def _writer(self):
+        conn = _connect(self.path)
+        pending = []
+        stop = False
+        while not stop:
+            try:
+                kind, payload = self._q.get(timeout=self.flush_secs if pending else None)
+            except queue.Empty:
+                kind, payload = None, None
+            if kind == "row":
+                pending.append(payload)
+            elif kind == "import":
+                self._import(conn, *payload)
+            elif kind == "stop":
+                stop = True
+            if pending and (kind is None or kind in ("stop", "flush") or len(pending) >= self.batch_size):
+                try:
+                    with conn:
+                        conn.executemany(_INSERT, pending)
+                except sqlite3.Error as e:
+                    print("[SessionDB] write failed:", e)
+                pending = []
+            if kind == "flush":
+                payload.set()
+            if kind is not None:
+                self._q.task_done()
+        conn.close()
+
+    @staticmethod
+    def _import(conn, days_map, marker):
+        if conn.execute("SELECT 1 FROM meta WHERE key=?", (marker,)).fetchone():
+            return
+        if callable(days_map):
+            days_map = days_map()
+        try:
+            with conn:
+                conn.executemany(_INSERT, day_rows(days_map))
+                conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (marker, str(time.time())))
+        except sqlite3.Error as e:
+            print("[SessionDB] import failed:", e)
+
+    def request_flush(self) -> threading.Event:
+        """Commit everything queued so far; the event is set once it is."""
+        done = threading.Event()
+        self._q.put(("flush", done))
+        return done
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Wait until everything queued so far is committed; False on timeout."""
+        ok = self.request_flush().wait(timeout)
+        if not ok:
+            print(f"[SessionDB] writer did not catch up within {timeout:g}s")
+        return ok
+
+    def close(self):
+        self._q.put(("stop", None))
+        self._thread.join(timeout=10)
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    # ----------------- Queries -----------------
+    def _conn(self):
+        # Queries run on the caller's (Tk) thread with their own connection
+        if self._reader is None:
+            self._reader = _connect(self.path)
+        return self._reader
+
+    def hour_weekday_minutes(self, start: dt.date = None, end: dt.date = None, mode: str = "focus"):
+        """7 x 24 list of completed minutes by weekday (rows Mon..Sun) and hour."""
+        lo = start.toordinal() if start else 0
+        hi = end.toordinal() if end else dt.date.max.toordinal()
+        grid = [[0.0] * 24 for _ in range(7)]
+        rows = self._conn().execute(
+            "SELECT weekday, hour, SUM(secs) FROM hourly"
+            " WHERE mode=? AND local_day BETWEEN ? AND ? AND hour >= 0"
+            " GROUP BY weekday, hour", (mode, lo, hi))
+        for wd, hr, secs in rows:
+            grid[wd][hr] = secs / 60.0
+        return grid
+
+    def daily_sessions(self, start: dt.date, end: dt.date, mode: str = "focus"):
+        """{date ordinal: completed sessions} for days in [start, end]."""
+        rows = self._conn().execute(
+            "SELECT local_day, SUM(sessions) FROM hourly"
+            " WHERE mode=? AND local_day BETWEEN ? AND ?"
+            " GROUP BY local_day", (mode, start.toordinal(), end.toordinal()))
+        return dict(rows)
+
+    def first_day(self, mode: str = "focus"):
+        row = self._conn().execute(
+            "SELECT MIN(local_day) FROM hourly WHERE mode=?", (mode,)).fetchone()
+        return dt.date.fromordinal(row[0]) if row and row[0] else None
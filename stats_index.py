@@ -0,0 +1,192 @@
+"""In-memory daily stats index backed by numpy arrays.
+
+`data["days"]` (ISO date -> {"focus_sessions", "minutes"}) is loaded once
+into contiguous arrays indexed by day ordinal. Cumulative sums make range
+totals O(1); streaks, rolling averages and the heatmap matrix are
+vectorised, so no statistic needs a Python loop over days.
+"""
+import datetime as dt
+
+import numpy as np
+
+_EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+
+
+def _as_ordinal(day) -> int:
+    if isinstance(day, int):
+        return day
+    if isinstance(day, str):
+        day = dt.date.fromisoformat(day)
+    return day.toordinal()
+
+
+def _parse_ordinals(keys):
+    """ISO date strings -> int64 ordinals (vectorised; invalid keys -> -1)."""
+    try:
+        return np.array(keys, dtype="datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+    except ValueError:
+        out = np.full(len(keys), -1, dtype=np.int64)
+        for i, k in enumerate(keys):
+            try:
+                out[i] = dt.date.fromisoformat(k).toordinal()
+            except (TypeError, ValueError):
+                pass
+        return out
+
+
+class StatsIndex:
+    """Per-day `sessions`/`minutes` arrays plus their running totals.
+
+    Slot `i` holds day ordinal `origin + i`. Arrays grow geometrically at
+    the end, so the usual update (today) is O(1) amortised, and so is
+    keeping the cumulative sums current.
+    """
+
+    def __init__(self, origin: int, size: int = 0):
+        self.origin = int(origin)
+        self.size = int(size)          # days in use
+        cap = max(64, self.size)
+        self.sessions = np.zeros(cap, dtype=np.int64)
+        self.minutes = np.zeros(cap, dtype=np.int64)
+        # cum_*[i] = sum of days [0, i); length cap + 1
+        self.cum_sessions = np.zeros(cap + 1, dtype=np.int64)
+        self.cum_minutes = np.zeros(cap + 1, dtype=np.int64)
+
+    @classmethod
+    def from_days(cls, days_map: dict, today: dt.date = None):
+        today_ord = (today or dt.date.today()).toordinal()
+        keys = list(days_map.keys())
+        ords = _parse_ordinals(keys) if keys else np.zeros(0, dtype=np.int64)
+        ok = ords > 0
+        origin = int(ords[ok].min()) if ok.any() else today_ord
+        end = max(today_ord, int(ords[ok].max()) if ok.any() else today_ord)
+        idx = cls(origin, end - origin + 1)
+        if ok.any():
+            recs = [days_map[k] for k, good in zip(keys, ok) if good]
+            pos = ords[ok] - origin
+            idx.sessions[pos] = [int(r.get("focus_sessions", 0)) for r in recs]
+            idx.minutes[pos] = [int(r.get("minutes", 0)) for r in recs]
+        idx._rebuild_cum()
+        return idx
+
+    # ----------------- Maintenance -----------------
+    def _rebuild_cum(self):
+        n = self.size
+        np.cumsum(self.sessions[:n], out=self.cum_sessions[1:n + 1])
+        np.cumsum(self.minutes[:n], out=self.cum_minutes[1:n + 1])
+
+    def _grow_to(self, ordinal: int):
+        if ordinal < self.origin:
+            # Rare (back-dated import): shift everything right
+            shift = self.origin - ordinal
+            n = self.size
+            cap = max(len(self.sessions), n + shift)
+            for name in ("sessions", "minutes"):
+                arr = np.zeros(cap, dtype=np.int64)
+                arr[shift:shift + n] = getattr(self, name)[:n]
+                setattr(self, name, arr)
+            self.cum_sessions = np.zeros(cap + 1, dtype=np.int64)
+            self.cum_minutes = np.zeros(cap + 1, dtype=np.int64)
+            self.origin, self.size = ordinal, n + shift
+            self._rebuild_cum()
+            return
+        need = ordinal - self.origin + 1
+        if need <= self.size:
+            return
+        if need > len(self.sessions):
+            cap = max(need, 2 * len(self.sessions))
+            for name in ("sessions", "minutes"):
+                arr = np.zeros(cap, dtype=np.int64)
+                arr[:self.size] = getattr(self, name)[:self.size]
+                setattr(self, name, arr)
+            for name in ("cum_sessions", "cum_minutes"):
+                arr = np.zeros(cap + 1, dtype=np.int64)
+                arr[:self.size + 1] = getattr(self, name)[:self.size + 1]
+                setattr(self, name, arr)
+        # New empty days carry the running total forward
+        self.cum_sessions[self.size + 1:need + 1] = self.cum_sessions[self.size]
+        self.cum_minutes[self.size + 1:need + 1] = self.cum_minutes[self.size]
+        self.size = need
+
+    def add(self, day, sessions: int = 1, minutes: int = 0):
+        """Record `sessions`/`minutes` on `day` (O(1) for today)."""
+        o = _as_ordinal(day)
+        self._grow_to(o)
+        i = o - self.origin
+        self.sessions[i] += sessions
+        self.minutes[i] += minutes
+        self.cum_sessions[i + 1:self.size + 1] += sessions
+        self.cum_minutes[i + 1:self.size + 1] += minutes
+
+    # ----------------- Queries -----------------
+    def _clip(self, start: int, end: int):
+        lo = max(start - self.origin, 0)
+        hi = min(end - self.origin + 1, self.size)
+        return lo, hi
+
+    def total(self, start, end):
+        """(sessions, minutes) over the inclusive date range [start, end]."""
+        lo, hi = self._clip(_as_ordinal(start), _as_ordinal(end))
+        if hi <= lo:
+            return 0, 0
+        return (int(self.cum_sessions[hi] - self.cum_sessions[lo]),
+                int(self.cum_minutes[hi] - self.cum_minutes[lo]))
+
+    def day(self, day):
+        o = _as_ordinal(day)
+        return self.total(o, o)
+
+    def series(self, start, end, field: str = "sessions"):
+        """Values for every day in [start, end], zero-filled outside the index."""
+        s, e = _as_ordinal(start), _as_ordinal(end)
+        out = np.zeros(max(0, e - s + 1), dtype=np.int64)
+        lo, hi = self._clip(s, e)
+        if hi > lo:
+            src = self.sessions if field == "sessions" else self.minutes
+            off = self.origin + lo - s
+            out[off:off + hi - lo] = src[lo:hi]
+        return out
+
+    def rolling_mean(self, window: int, field: str = "minutes"):
+        """Trailing `window`-day mean for every indexed day."""
+        cum = (self.cum_sessions if field == "sessions" else self.cum_minutes)[:self.size + 1]
+        i = np.arange(1, self.size + 1)
+        lo = np.maximum(i - window, 0)
+        return (cum[i] - cum[lo]) / float(window)
+
+    def _runs(self):
+        """Start/end slots (end exclusive) of consecutive active days."""
+        active = np.concatenate(([0], (self.sessions[:self.size] > 0).astype(np.int8), [0]))
+        edges = np.flatnonzero(np.diff(active))
+        return edges[0::2], edges[1::2]
+
+    def longest_streak(self) -> int:
+        starts, ends = self._runs()
+        return int((ends - starts).max()) if len(starts) else 0
+
+    def current_streak(self, today: dt.date = None) -> int:
+        """Active days ending today (or yesterday, if today has none yet)."""
+        t = (today or dt.date.today()).toordinal() - self.origin
+        starts, ends = self._runs()
+        if not len(starts):
+            return 0
+        hit = (ends == t + 1) | (ends == t)
+        return int((ends - starts)[hit].max()) if hit.any() else 0
+
+    def best_day(self):
+        """(date, sessions) of the day with the most sessions, or None."""
+        if not self.size or not self.sessions[:self.size].any():
+            return None
+        i = int(self.sessions[:self.size].argmax())
+        return dt.date.fromordinal(self.origin + i), int(self.sessions[i])
+
+    def heat_matrix(self, today: dt.date, window_days: int):
+        """7 x weeks matrix (rows Mon..Sun) for the window ending `today`."""
+        t = today.toordinal()
+        start = t - window_days + 1
+        first_monday = start - dt.date.fromordinal(start).weekday()
+        weeks = (t - first_monday) // 7 + 1
+        cells = self.series(first_monday, first_monday + weeks * 7 - 1)
+        cells[:start - first_monday] = 0   # days before the window
+        cells[t - first_monday + 1:] = 0   # days after today
+        return cells.reshape(weeks, 7).T
@@ -0,0 +1,111 @@
+"""Minimal client for the timer's status endpoint (see status_server.py).
+
+    python status_client.py                 # print the current status once
+    python status_client.py --follow        # stream events until Ctrl+C
+    python status_client.py --record        # read the mmap record, no socket
+    python status_client.py --bench 200     # N subscribers, report delivery lag
+
+Also usable as a library: `status()`, `subscribe()` and `read_record()`.
+"""
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+
+from status_server import default_record_path, default_socket_path, read_record
+
+
+def _connect(path: str, cmd: bytes):
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.connect(path)
+    s.sendall(cmd + b"\n")
+    return s
+
+
+def status(path: str = None) -> dict:
+    """Current status as sent by the server (None before the first event)."""
+    with _connect(path or default_socket_path(), b"status") as s:
+        f = s.makefile("rb")
+        line = f.readline()
+    return json.loads(line) if line else None
+
+
+def subscribe(path: str = None):
+    """Yield events (dicts) until the server goes away."""
+    with _connect(path or default_socket_path(), b"subscribe") as s:
+        for line in s.makefile("rb"):
+            yield json.loads(line)
+
+
+def _fmt(ev: dict) -> str:
+    secs = int(round(ev.get("remaining", 0)))
+    state = "running" if ev.get("running") else "paused"
+    return (f"{ev.get('event', 'status'):<6} {ev.get('phase', '?'):<5} {secs // 60:02d}:{secs % 60:02d} "
+            f"{state:<7} focus sessions: {ev.get('completed_focus', 0)}")
+
+
+def bench(path: str, n: int, secs: float):
+    """Hold `n` subscribers for `secs` and report how late events arrive."""
+    lags, errors = [], []
+    lock = threading.Lock()
+
+    def _sub():
+        try:
+            for ev in subscribe(path):
+                lag = time.time() - ev.get("ts", time.time())
+                with lock:
+                    lags.append(lag)
+        except Exception as e:
+            errors.append(e)
+
+    for _ in range(n):
+        threading.Thread(target=_sub, daemon=True).start()
+    time.sleep(secs)
+    with lock:
+        s = sorted(lags)
+    if not s:
+        print("no events received (is the timer running?)")
+        return
+    pct = lambda p: s[min(len(s) - 1, int(p / 100.0 * len(s)))] * 1000.0  # noqa: E731
+    print(f"{n} subscribers, {len(s)} events in {secs:g}s: "
+          f"lag p50 {pct(50):.2f} ms, p99 {pct(99):.2f} ms, max {s[-1] * 1000:.2f} ms; errors {len(errors)}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Read the Pomodoro timer status.")
+    ap.add_argument("--socket", default=None, help="socket path (default: per-user file in $XDG_RUNTIME_DIR or the temp dir)")
+    ap.add_argument("--follow", action="store_true", help="stream events")
+    ap.add_argument("--record", action="store_true", help="read the binary record instead of the socket")
+    ap.add_argument("--json", action="store_true", help="print raw JSON")
+    ap.add_argument("--bench", type=int, metavar="N", help="subscribe N clients and report delivery lag")
+    ap.add_argument("--secs", type=float, default=10.0, help="duration for --bench")
+    args = ap.parse_args(argv)
+    path = args.socket or default_socket_path()
+
+    try:
+        if args.bench:
+            bench(path, args.bench, args.secs)
+        elif args.record:
+            rec = read_record(default_record_path(path))
+            print(json.dumps(rec) if args.json else _fmt(rec))
+        elif args.follow:
+            for ev in subscribe(path):
+                print(json.dumps(ev) if args.json else _fmt(ev), flush=True)
+        else:
+            ev = status(path)
+            if ev is None:
+                print("no status yet")
+            else:
+                print(json.dumps(ev) if args.json else _fmt(ev))
+    except (OSError, ValueError) as e:
+        print("Status endpoint unavailable:", e, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""Local push endpoint for the timer state (Unix domain socket + mmap record).
+
+Status bars and dashboards connect to the socket and send one line:
+
+    subscribe   -> the current status, then one NDJSON line per event
+                   ("tick" each displayed second, "phase" on phase changes,
+                   "state" on start/pause/reset/mode changes)
+    status      -> the current status as one JSON line, then EOF
+
+The server runs on its own asyncio loop in a daemon thread. The Tk thread
+only hands events over with `publish()`; each event is serialised once
+and the same bytes are written to every subscriber. Subscribers that stop
+reading are dropped once their send buffer passes `max_buffer`, so a
+stuck client can't grow memory or delay the others.
+
+Clients that only need the current value can skip the socket and read the
+fixed-size binary record in `record_path` (see `RECORD` / `read_record`),
+which is rewritten in place on every event under a sequence lock.
+
+Both files live in $XDG_RUNTIME_DIR, or else in a private (0700)
+per-user directory under the temp dir, never directly in a shared one.
+"""
+import asyncio
+import json
+import mmap
+import os
+import socket
+import stat
+import struct
+import tempfile
+import threading
+import time
+
+# magic, version, phase (0 focus / 1 break), running, seq, completed_focus,
+# remaining secs, deadline (unix secs, 0 when paused), updated (unix secs)
+RECORD = struct.Struct("<4sBBBxIIddd")
+RECORD_MAGIC = b"POMO"
+RECORD_VERSION = 1
+_SEQ_OFFSET = 8
+PHASES = ("focus", "break")
+
+
+def _uid() -> int:
+    return os.getuid() if hasattr(os, "getuid") else os.getpid()
+
+
+def _fallback_dir() -> str:
+    return os.path.join(tempfile.gettempdir(), f"pomodoro-{_uid()}")
+
+
+def default_socket_path() -> str:
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, f"pomodoro-{_uid()}.sock")
+    return os.path.join(_fallback_dir(), "pomodoro.sock")
+
+
+def ensure_private_dir(path: str):
+    """Create `path` as 0700, or check that an existing one is ours and private."""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise OSError(f"{path} is not a private directory owned by this user")
+
+
+def default_record_path(sock_path: str) -> str:
+    root, _ = os.path.splitext(sock_path)
+    return root + ".status"
+
+
+def encode_event(event: dict) -> bytes:
+    return (json.dumps(event, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def decode_record(buf) -> dict:
+    """Decode one status record; raises ValueError on a torn or foreign buffer."""
+    magic, version, phase, running, seq, completed, remaining, deadline, updated = RECORD.unpack_from(buf)
+    if magic != RECORD_MAGIC or version != RECORD_VERSION:
+        raise ValueError("not a status record")
+    if seq & 1:
+        raise ValueError("record is being written")
+    return {"phase": PHASES[phase], "running": bool(running), "seq": seq, "completed_focus": completed,
+            "remaining": remaining, "deadline": deadline or None, "updated": updated}
+
+
+def read_record(path: str, retries: int = 100) -> dict:
+    """Current status from the binary record (consistent snapshot)."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), RECORD.size, access=mmap.ACCESS_READ) as m:
+        for _ in range(retries):
+            try:
+                rec = decode_record(m)
+            except ValueError:
+                time.sleep(0.0005)
+                continue
+            # The seq must not have moved while the fields were copied
+            if struct.unpack_from("<I", m, _SEQ_OFFSET)[0] == rec["seq"]:
+                return rec
+        raise ValueError("status record kept changing")
+
+
+class _Record:
+    """Writer side of the mmap status record (one writer: the server loop)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.seq = 0
+        # O_NOFOLLOW: never truncate whatever a planted symlink points at
+        flags = os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_CLOEXEC", 0)
+        fd = os.open(path, flags, 0o600)
+        try:
+            os.ftruncate(fd, RECORD.size)
+            self._mm = mmap.mmap(fd, RECORD.size)
+        finally:
+            os.close(fd)
+
+    def write(self, event: dict):
+        m = self._mm
+        self.seq += 1                                  # odd while fields change: readers retry
+        struct.pack_into("<I", m, _SEQ_OFFSET, self.seq)
+        RECORD.pack_into(m, 0, RECORD_MAGIC, RECORD_VERSION, PHASES.index(event["phase"]),
+                         int(event["running"]), self.seq, int(event["completed_focus"]),
+                         float(event["remaining"]), float(event.get("deadline") or 0.0),
+                         float(event["ts"]))
+        self.seq += 1
+        struct.pack_into("<I", m, _SEQ_OFFSET, self.seq)
+
+    def close(self):
+        self._mm.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class StatusServer:
+    """Unix-socket NDJSON publisher plus the mmap record, on a private loop."""
+
+    def __init__(self, sock_path: str = None, record_path: str = None, max_buffer: int = 64 * 1024):
+        self.sock_path = sock_path or default_socket_path()
+        self.record_path = record_path or default_record_path(self.sock_path)
+        self.max_buffer = int(max_buffer)
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._stopped = None
+        self._record = None
+        self._subs = set()          # subscribed StreamWriters (loop thread only)
+        self._clients = {}          # handler task -> its StreamWriter
+        self._last = None           # last event, serialised
+        self.sent = 0               # lines written to subscribers
+        self.dropped = 0            # subscribers dropped for not reading
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subs)
+
+    # ----------------- Lifecycle -----------------
+    def start(self) -> bool:
+        if not hasattr(socket, "AF_UNIX"):
+            print("[Status] Unix sockets not supported here; status endpoint disabled")
+            return False
+        if os.path.dirname(self.sock_path) == _fallback_dir():
+            try:
+                ensure_private_dir(_fallback_dir())
+            except OSError as e:
+                print("[Status] Disabled:", e)
+                return False
+        if self._in_use():
+            return False
+        ready = threading.Event()
+        errors = []
+        self._thread = threading.Thread(target=self._run, args=(ready, errors), name="status-server", daemon=True)
+        self._thread.start()
+        ready.wait(5.0)
+        if errors:
+            print("[Status] Disabled:", errors[0])
+            return False
+        print("[Status] Serving on", self.sock_path)
+        return True
+
+    def _in_use(self) -> bool:
+        """True if the socket path can't be used; removes our own stale socket."""
+        try:
+            st = os.lstat(self.sock_path)
+        except FileNotFoundError:
+            return False
+        if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+            print("[Status] Not our socket, leaving it alone:", self.sock_path)
+            return True
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            s.connect(self.sock_path)
+            print("[Status] Another instance is serving", self.sock_path)
+            return True
+        except OSError:
+            try:
+                os.remove(self.sock_path)  # left behind by a crash
+            except OSError:
+                pass
+            return False
+        finally:
+            s.close()
+
+    def _run(self, ready, errors):
+        loop = self._loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._serve(ready, errors))
+        finally:
+            loop.close()
+
+    async def _serve(self, ready, errors):
+        self._stopped = asyncio.get_running_loop().create_future()
+        try:
+            # Bound with a 0600 mode from the start (no window before a chmod)
+            old_umask = os.umask(0o077)
+            try:
+                self._server = await asyncio.start_unix_server(self._handle, path=self.sock_path)
+            finally:
+                os.umask(old_umask)
+            self._record = _Record(self.record_path)
+        except Exception as e:
+            errors.append(e)
+            if self._server is not None:  # bound, but the record failed
+                self._server.close()
+                await self._server.wait_closed()
+                try:
+                    os.remove(self.sock_path)
+                except OSError:
+                    pass
+            ready.set()
+            return
+        ready.set()
+        await self._stopped
+        self._server.close()
+        for w in list(self._clients.values()):
+            w.close()  # handlers see EOF and finish on their own
+        if self._clients:
+            await asyncio.wait(list(self._clients), timeout=1.0)
+        await self._server.wait_closed()
+        self._record.close()
+        try:
+            os.remove(self.sock_path)
+        except OSError:
+            pass
+
+    def close(self):
+        loop = self._loop
+        if loop is None or self._thread is None:
+            return
+        try:
+            loop.call_soon_threadsafe(lambda: self._stopped.done() or self._stopped.set_result(None))
+        except RuntimeError:
+            return  # loop already gone
+        self._thread.join(timeout=2.0)
+
+    # ----------------- Publishing -----------------
+    def publish(self, event: dict):
+        """Hand `event` to the server loop (any thread, never blocks)."""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._broadcast, event)
+        except RuntimeError:
+            pass  # shutting down
+
+    def _broadcast(self, event: dict):
+        if self._record is not None:
+            self._record.write(event)
+        line = self._last = encode_event(event)  # once, shared by every subscriber
+        for w in list(self._subs):
+            if w.transport.get_write_buffer_size() > self.max_buffer:
+                self._subs.discard(w)
+                self.dropped += 1
+                w.close()
+                continue
+            w.write(line)
+            self.sent += 1
+
+    # ----------------- Clients -----------------
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._clients[task] = writer
+        try:
+            await self._serve_client(reader, writer)
+        finally:
+            del self._clients[task]
+            writer.close()
+
+    async def _serve_client(self, reader, writer):
+        try:
+            cmd = (await asyncio.wait_for(reader.readline(), 5.0)).strip().lower()
+        except (asyncio.TimeoutError, ConnectionError):
+            return
+        if cmd in (b"status", b""):
+            if self._last is not None:
+                writer.write(self._last)
+            return
+        if cmd != b"subscribe":
+            writer.write(encode_event({"event": "error", "error": f"unknown command {cmd.decode(errors='replace')!r}"}))
+            return
+        if self._last is not None:
+            writer.write(self._last)
+        self._subs.add(writer)
+        try:
+            while await reader.read(4096):
+                pass  # subscribers don't talk; wait for them to hang up
+        except ConnectionError:
+            pass
+        finally:
+            self._subs.discard(writer)
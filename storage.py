@@ -0,0 +1,534 @@
+"""Journaled persistence for data.json.
+
+Every change (a finished focus session, a settings edit) is appended to
+`<data>.journal` as one JSON line. The `data.json` snapshot is rebuilt
+in the background by compaction (write temp file, fsync, os.replace), so
+per-session write cost stays constant no matter how much history exists.
+
+Startup loads the snapshot, then replays journal records newer than the
+snapshot's `journal_seq`. A torn trailing record from a crash is skipped.
+
+History is tiered: only the current and previous month stay in the
+snapshot's `days` map ("hot"). Compaction rolls older days into gzipped
+per-year archives under `<data>.archive/`, and the snapshot keeps a small
+`archives` manifest with each year's file name and precomputed aggregates
+(totals, best day, streak runs). Archive files are immutable and named by
+a write counter kept in the snapshot (`archive_gen`), so every rewrite of
+a year gets a new file name; the snapshot that references a file is
+the commit point, so a crash mid-roll only leaves an unreferenced file that
+the next compaction deletes. Archives are read lazily, when a range query
+reaches their year.
+
+Only one process may write a data file at a time: `load()` takes an
+exclusive lock on `<data>.lock` and holds it until `close()`, so a second
+writer (another app instance, history_io's importer) fails with
+StoreLocked instead of silently losing the other's records. Read-only
+loads (`compact=False`) don't lock and can't write.
+"""
+import datetime as dt
+import gzip
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl  # POSIX
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt  # Windows
+except ImportError:
+    msvcrt = None
+
+ARCHIVE_VERSION = 1
+
+
+def empty_data() -> dict:
+    return {"days": {}, "settings": {}}
+
+
+def apply_record(data: dict, rec: dict):
+    """Apply one journal record to the in-memory data dict."""
+    op = rec.get("op")
+    if op == "session":
+        dayrec = data.setdefault("days", {}).setdefault(rec["date"], {"focus_sessions": 0, "minutes": 0})
+        dayrec["focus_sessions"] += int(rec.get("sessions", 1))
+        dayrec["minutes"] += int(rec.get("minutes", 0))
+    elif op == "days":
+        # Bulk merge: {"YYYY-MM-DD": [sessions, minutes], ...}
+        days = data.setdefault("days", {})
+        for date_iso, (sessions, minutes) in rec.get("days", {}).items():
+            dayrec = days.setdefault(date_iso, {"focus_sessions": 0, "minutes": 0})
+            dayrec["focus_sessions"] += int(sessions)
+            dayrec["minutes"] += int(minutes)
+    elif op == "setting":
+        data.setdefault("settings", {})[rec["key"]] = rec.get("value")
+
+
+def _fsync_dir(path: str):
+    # Make the rename itself durable where the platform allows it
+    if os.name != "posix":
+        return
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Write `data` to `path` via a temp file + os.replace."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path)
+
+
+def atomic_write_text(path: str, text: str):
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def atomic_write_json(path: str, obj, **dump_kwargs):
+    atomic_write_text(path, json.dumps(obj, ensure_ascii=False, **dump_kwargs))
+
+
+# ----------------- Year aggregates -----------------
+def _is_iso_date(key: str) -> bool:
+    try:
+        dt.date.fromisoformat(key)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def year_aggregate(year: int, days: dict) -> dict:
+    """Totals, best day and streak runs for one calendar year of `days`."""
+    first = dt.date(year, 1, 1).toordinal()
+    ndays = dt.date(year, 12, 31).toordinal() - first + 1
+    sessions = minutes = 0
+    best = None
+    active = []
+    for key, rec in days.items():
+        if not _is_iso_date(key):
+            continue
+        n = int(rec.get("focus_sessions", 0))
+        sessions += n
+        minutes += int(rec.get("minutes", 0))
+        if n > 0:
+            active.append(dt.date.fromisoformat(key).toordinal() - first)
+            if best is None or n > best[1] or (n == best[1] and key < best[0]):
+                best = [key, n]
+    active.sort()
+    longest = run = head = 0
+    prev = None
+    for i in active:
+        run = run + 1 if prev == i - 1 else 1
+        longest = max(longest, run)
+        if i == run - 1:
+            head = run          # run still anchored at Jan 1
+        prev = i
+    tail = run if active and active[-1] == ndays - 1 else 0
+    return {"sessions": sessions, "minutes": minutes, "active_days": len(active), "days": ndays,
+            "best": best, "longest": longest, "head": head, "tail": tail}
+
+
+def chain_longest_streak(aggs: dict) -> int:
+    """Longest run of active days across consecutive years' aggregates."""
+    longest = run = 0
+    prev = None
+    for year in sorted(aggs):
+        a = aggs[year]
+        if prev is not None and year != prev + 1:
+            run = 0
+        if a["active_days"] == a["days"]:
+            run += a["days"]
+        else:
+            longest = max(longest, run + a["head"], a["longest"])
+            run = a["tail"]
+        longest = max(longest, run)
+        prev = year
+    return longest
+
+
+def run_ending_year(aggs: dict, year: int) -> int:
+    """Active days in the run that ends on Dec 31 of `year`."""
+    run = 0
+    while year in aggs:
+        a = aggs[year]
+        if a["active_days"] != a["days"]:
+            return run + a["tail"]
+        run += a["days"]
+        year -= 1
+    return run
+
+
+def _archive_gen(name: str) -> int:
+    """Counter part of an archive file name (`<year>-<gen>.json.gz`), or 0."""
+    try:
+        return int(name.split(".", 1)[0].split("-", 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+class StoreLocked(OSError):
+    """Another DataStore (usually the running app) holds the data file."""
+
+
+def _acquire_lock(path: str):
+    """Open `path` and take a non-blocking exclusive lock; the file object holds it."""
+    f = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        raise StoreLocked(f"{path} is held by another process (close the app first)") from None
+    return f
+
+
+def _merge_days(into: dict, days: dict):
+    for key, rec in days.items():
+        cur = into.get(key)
+        if cur is None:
+            into[key] = {"focus_sessions": int(rec.get("focus_sessions", 0)), "minutes": int(rec.get("minutes", 0))}
+        else:
+            cur["focus_sessions"] += int(rec.get("focus_sessions", 0))
+            cur["minutes"] += int(rec.get("minutes", 0))
+
+
+class DataStore:
+    """Snapshot + append-only journal behind the app's `data` dict."""
+
+    def __init__(self, path: str, compact_every: int = 100, hot_months: int = 2):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.lock_path = path + ".lock"
+        self.archive_dir = path + ".archive"
+        self.compact_every = int(compact_every)
+        self.hot_months = max(1, int(hot_months))
+        self.data = empty_data()
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._archives = {}           # archive file name -> days map, read on first use
+        self._seq = 0                 # seq of the last record written/replayed
+        self._pending = 0             # records since the last compaction
+        self._journal = None
+        self._compacting = None       # background compaction thread
+        self._lock_file = None        # holds the writer lock between load() and close()
+        self.read_only = False
+
+    # ----------------- Load -----------------
+    def load(self, compact: bool = True) -> dict:
+        """Read snapshot + journal; `compact=False` never writes (read-only users).
+
+        A writable load raises StoreLocked if another process holds the file.
+        """
+        self.read_only = not compact
+        if compact and self._lock_file is None:
+            self._lock_file = _acquire_lock(self.lock_path)
+        self.data = self._load_snapshot()
+        self._seq = int(self.data.get("journal_seq", 0))
+        self._pending = self._replay()
+        if compact and (self._pending or self._has_cold_days()):
+            self.compact_async()   # also rolls the month over / migrates a flat data.json
+        return self.data
+
+    def _load_snapshot(self) -> dict:
+        if not os.path.exists(self.path):
+            return empty_data()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("bad data.json structure")
+            data.setdefault("days", {})
+            data.setdefault("settings", {})
+            return data
+        except Exception as e:
+            # Keep the unreadable file around instead of overwriting it later
+            bad = f"{self.path}.bad-{int(time.time())}"
+            print(f"[Data] Unreadable {os.path.basename(self.path)} ({e}); moved to {bad}")
+            try:
+                os.replace(self.path, bad)
+            except OSError:
+                pass
+            return empty_data()
+
+    def _replay(self) -> int:
+        """Apply journal records newer than the snapshot; return how many."""
+        if not os.path.exists(self.journal_path):
+            return 0
+        applied = 0
+        with open(self.journal_path, "rb") as f:
+            for raw in f:
+                try:
+                    rec = json.loads(raw)
+                except ValueError:
+                    continue  # torn/partial record (crash mid-append)
+                seq = int(rec.get("seq", 0))
+                if seq <= self._seq:
+                    continue  # already folded into the snapshot
+                apply_record(self.data, rec)
+                self._seq = seq
+                applied += 1
+        return applied
+
+    # ----------------- Writes -----------------
+    def _open_journal(self):
+        if self._journal is not None:
+            return self._journal
+        f = open(self.journal_path, "ab+")
+        # A torn last line would swallow our next record; start a fresh line
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        self._journal = f
+        return f
+
+    def append(self, rec: dict):
+        """Apply `rec` to `data` and durably append it to the journal."""
+        if self._lock_file is None:
+            raise RuntimeError("DataStore is read-only (load() with compact=True to write)")
+        with self._lock:
+            self._seq += 1
+            rec = dict(rec, seq=self._seq)
+            apply_record(self.data, rec)
+            f = self._open_journal()
+            f.write(json.dumps(rec, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+            self._pending += 1
+            due = self._pending >= self.compact_every
+        if due:
+            self.compact_async()
+
+    def log_session(self, date_iso: str, minutes: int, sessions: int = 1):
+        self.append({"op": "session", "date": date_iso, "minutes": int(minutes), "sessions": int(sessions)})
+
+    def merge_days(self, deltas: dict):
+        """Add per-day totals ({date: [sessions, minutes]}) as one journal record."""
+        if deltas:
+            self.append({"op": "days", "days": deltas})
+
+    def set_setting(self, key: str, value):
+        self.append({"op": "setting", "key": key, "value": value})
+
+    # ----------------- Tiers -----------------
+    def hot_cutoff(self, today: dt.date = None) -> str:
+        """ISO date of the first hot day (first day of the previous month)."""
+        first = (today or dt.date.today()).replace(day=1)
+        for _ in range(self.hot_months - 1):
+            first = (first - dt.timedelta(days=1)).replace(day=1)
+        return first.isoformat()
+
+    def _has_cold_days(self) -> bool:
+        cutoff = self.hot_cutoff()
+        return any(key < cutoff and _is_iso_date(key) for key in self.data.get("days", {}))
+
+    def _archive_path(self, name: str) -> str:
+        return os.path.join(self.archive_dir, name)
+
+    def _read_archive(self, year: str, entry: dict) -> dict:
+        """Days map of one archived year (cached after the first read)."""
+        name = entry["file"]
+        days = self._archives.get(name)
+        if days is not None:
+            return days
+        try:
+            with gzip.open(self._archive_path(name), "rt", encoding="utf-8") as f:
+                days = json.load(f).get("days", {})
+        except (OSError, ValueError) as e:
+            with self._lock:
+                now = self.data.get("archives", {}).get(year)
+            if now is not None and now["file"] != name:
+                return self._read_archive(year, now)  # replaced by a compaction meanwhile
+            print(f"[Data] Unreadable archive {name} ({e}); year {year} skipped")
+            return {}
+        self._archives[name] = days
+        return days
+
+    def days_between(self, start: dt.date = None, end: dt.date = None) -> dict:
+        """Merged hot + archived days in [start, end]; loads only the archives it reaches."""
+        lo = start.isoformat() if start else ""
+        hi = end.isoformat() if end else "9999-99-99"
+        with self._lock:
+            manifest = dict(self.data.get("archives", {}))
+        wanted = {y: e for y, e in manifest.items() if lo[:4] <= y <= hi[:4]}
+        cold = {y: self._read_archive(y, e) for y, e in wanted.items()}
+        out = {}
+        for days in cold.values():
+            _merge_days(out, {k: v for k, v in days.items() if lo <= k <= hi})
+        with self._lock:
+            _merge_days(out, {k: v for k, v in self.data.get("days", {}).items() if lo <= k <= hi})
+        return out
+
+    def all_days(self) -> dict:
+        return self.days_between()
+
+    def year_aggregates(self) -> dict:
+        """{year: aggregate} over all history; archives are only read for
+        years that also have hot (not yet rolled) days."""
+        with self._lock:
+            manifest = dict(self.data.get("archives", {}))
+            hot_years = {k[:4] for k in self.data.get("days", {})}
+        aggs = {int(y): e["aggregate"] for y, e in manifest.items() if y not in hot_years}
+        for y in hot_years:
+            try:
+                year = int(y)
+            except ValueError:
+                continue
+            aggs[year] = year_aggregate(year, self.days_between(dt.date(year, 1, 1), dt.date(year, 12, 31)))
+        return aggs
+
+    # ----------------- Compaction -----------------
+    def compact(self):
+        """Fold the journal into a fresh snapshot and roll cold days into archives (blocking)."""
+        with self._compact_lock:
+            self._compact()
+
+    def _compact(self):
+        with self._lock:
+            seq = self._seq
+            self.data["journal_seq"] = seq
+            cutoff = self.hot_cutoff()
+            hot, cold = {}, {}
+            for key, rec in self.data.get("days", {}).items():
+                rec = dict(rec)
+                if key < cutoff and _is_iso_date(key):
+                    cold.setdefault(key[:4], {})[key] = rec
+                else:
+                    hot[key] = rec
+            snap = json.loads(json.dumps({k: v for k, v in self.data.items() if k != "days"}))
+            self._pending = 0
+        manifest = snap.setdefault("archives", {})
+        self._remove_orphans(manifest)
+        # Older snapshots named archives by journal seq; never reuse one of those names
+        gen = max([int(snap.get("archive_gen", 0))] + [_archive_gen(e["file"]) for e in manifest.values()])
+
+        replaced = []
+        for year, days in sorted(cold.items()):
+            if not days:
+                continue  # nothing new for this year; its archive stays as it is
+            merged = {}
+            entry = manifest.get(year)
+            if entry is not None:
+                _merge_days(merged, self._read_archive(year, entry))
+                replaced.append(entry["file"])
+            _merge_days(merged, days)
+            gen += 1
+            name = f"{year}-{gen:08d}.json.gz"
+            agg = year_aggregate(int(year), merged)
+            payload = json.dumps({"version": ARCHIVE_VERSION, "year": int(year), "aggregate": agg,
+                                  "days": dict(sorted(merged.items()))}, ensure_ascii=False)
+            os.makedirs(self.archive_dir, exist_ok=True)
+            atomic_write_bytes(self._archive_path(name), gzip.compress(payload.encode("utf-8"), 6))
+            manifest[year] = {"file": name, "aggregate": agg}
+            cold[year] = (days, merged)
+        cold = {y: v for y, v in cold.items() if isinstance(v, tuple)}
+        snap["days"] = hot
+        snap["archive_gen"] = gen
+        atomic_write_text(self.path, json.dumps(snap, ensure_ascii=False, indent=2))
+
+        with self._lock:
+            # Days rolled out above leave the hot map; anything added to them
+            # since (journal seq > `seq`) stays hot until the next compaction.
+            days = self.data.setdefault("days", {})
+            for year, (rolled, merged) in cold.items():
+                for key, rec in rolled.items():
+                    cur = days.get(key)
+                    if cur is None:
+                        continue
+                    cur["focus_sessions"] -= int(rec.get("focus_sessions", 0))
+                    cur["minutes"] -= int(rec.get("minutes", 0))
+                    if cur["focus_sessions"] <= 0 and cur["minutes"] <= 0:
+                        del days[key]
+                self._archives[manifest[year]["file"]] = merged
+            self.data["archives"] = manifest
+            self.data["archive_gen"] = gen
+            self._truncate_journal(seq)
+        live = {e["file"] for e in manifest.values()}
+        for name in replaced:
+            if name in live:
+                continue  # never delete a file the new snapshot points at
+            self._archives.pop(name, None)
+            try:
+                os.remove(self._archive_path(name))
+            except OSError:
+                pass
+
+    def _remove_orphans(self, manifest: dict):
+        """Delete archive files no snapshot references (a crash mid-roll)."""
+        try:
+            names = os.listdir(self.archive_dir)
+        except OSError:
+            return
+        live = {e["file"] for e in manifest.values()}
+        for name in names:
+            if name.endswith(".json.gz") and name not in live:
+                try:
+                    os.remove(self._archive_path(name))
+                except OSError:
+                    pass
+
+    def _truncate_journal(self, upto_seq: int):
+        """Drop journal records already covered by the snapshot (lock held)."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if not os.path.exists(self.journal_path):
+            return
+        keep = []
+        with open(self.journal_path, "rb") as f:
+            for raw in f:
+                try:
+                    if int(json.loads(raw).get("seq", 0)) > upto_seq:
+                        keep.append(raw if raw.endswith(b"\n") else raw + b"\n")
+                except ValueError:
+                    continue
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.writelines(keep)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+        _fsync_dir(self.journal_path)
+
+    def compact_async(self):
+        if self._compacting is not None and self._compacting.is_alive():
+            return
+        self._compacting = threading.Thread(target=self._compact_quietly, daemon=True)
+        self._compacting.start()
+
+    def _compact_quietly(self):
+        try:
+            self.compact()
+        except Exception as e:
+            print("[Data] Compaction failed:", e)
+
+    def close(self):
+        """Wait for background work and leave a compacted snapshot behind."""
+        if self._compacting is not None:
+            self._compacting.join()
+        if self._pending and not self.read_only:
+            self._compact_quietly()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if self._lock_file is not None:
+                self._lock_file.close()  # releases the writer lock
+                self._lock_file = None
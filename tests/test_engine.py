@@ -0,0 +1,180 @@
+"""PomodoroEngine pause/resume and deadline chaining; SessionManager's heap."""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import BREAK, FOCUS, PomodoroEngine, SessionManager  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_pause_resume_keeps_exact_remaining():
+    clock = FakeClock()
+    eng = PomodoroEngine(focus_secs=1500, break_secs=300, clock=clock)
+    ran = 0.0
+    for i in range(1000):
+        eng.start()
+        step = 0.1 + (i % 7) * 0.013
+        clock.now += step
+        ran += step
+        eng.pause()
+        clock.now += 3.7  # time spent paused never counts
+    assert not eng.running and eng.deadline is None
+    assert eng.remaining == pytest.approx(1500 - ran, abs=1e-9)
+    assert eng.remaining_at(clock.now + 100) == eng.remaining
+    eng.start()
+    assert eng.deadline == pytest.approx(clock.now + 1500 - ran, abs=1e-9)
+
+
+def test_pause_past_deadline_clamps_to_zero():
+    clock = FakeClock()
+    eng = PomodoroEngine(focus_secs=10, break_secs=5, clock=clock)
+    eng.start()
+    clock.now += 12
+    eng.pause()
+    assert eng.remaining == 0.0
+    assert eng.phase == FOCUS  # pause never ends a phase; poll does
+
+
+def test_poll_before_deadline_and_while_paused():
+    clock = FakeClock()
+    eng = PomodoroEngine(focus_secs=10, break_secs=5, clock=clock)
+    assert eng.poll() is None  # not started
+    eng.start()
+    assert eng.poll(clock.now + 9.999) is None
+    eng.pause(clock.now + 5)
+    assert eng.poll(clock.now + 60) is None
+
+
+def test_poll_stops_without_auto_continue():
+    clock = FakeClock()
+    eng = PomodoroEngine(focus_secs=10, break_secs=5, clock=clock)
+    eng.start()
+    change = eng.poll(clock.now + 11.5)
+    assert (change.ended, change.started, change.at) == (FOCUS, BREAK, 1010.0)
+    assert not eng.running and eng.deadline is None
+    assert eng.remaining == 5.0
+    assert eng.completed_focus == 1
+
+
+def test_poll_chains_from_the_old_deadline():
+    clock = FakeClock()
+    eng = PomodoroEngine(focus_secs=10, break_secs=5, clock=clock, auto_continue=True)
+    eng.start()
+    late = eng.poll(1012.7)                # polled 2.7 s late
+    assert late.at == 1010.0
+    assert eng.deadline == 1015.0          # not 1012.7 + 5
+    assert eng.poll(1014.9) is None
+    back = eng.poll(1015.0)
+    assert (back.ended, back.started, back.at) == (BREAK, FOCUS, 1015.0)
+    assert eng.deadline == 1025.0
+    # Many late polls: the schedule still lands on exact multiples
+    for _ in range(100):
+        eng.poll(eng.deadline + 0.4)
+    assert eng.deadline == pytest.approx(1025.0 + 50 * 15, abs=1e-9)
+    assert eng.completed_focus == 51
+
+
+def test_set_durations_and_reset():
+    eng = PomodoroEngine(focus_secs=10, break_secs=5, clock=FakeClock())
+    eng.set_durations(50 * 60, 10 * 60)
+    assert eng.remaining == 3000.0         # stopped: takes the new length now
+    eng.start()
+    eng.set_durations(60, 30)
+    assert eng.remaining_at(eng.clock.now) == 3000.0  # running phase keeps its deadline
+    gen = eng.gen
+    eng.reset()
+    assert (eng.phase, eng.running, eng.remaining) == (FOCUS, False, 60.0)
+    assert eng.gen > gen
+
+
+# ----------------- SessionManager -----------------
+def test_pop_due_skips_stale_entries():
+    clock = FakeClock(0.0)
+    mgr = SessionManager(clock=clock)
+    a = mgr.add(10, 5)
+    b = mgr.add(20, 5)
+    c = mgr.add(10, 5)
+    mgr.pause(a.sid)                       # a's heap entry is now stale
+    clock.now = 4.0
+    mgr.start(a.sid)                       # re-pushed with deadline 14
+    mgr.remove(c.sid)
+    assert len(mgr._heap) == 4
+
+    clock.now = 12.0
+    assert mgr._pop_due(12.0) == []        # a@10 is stale, c is removed
+    batch = mgr._pop_due(14.0)
+    assert [ch.engine for ch in batch] == [a]
+    assert a.deadline == 19.0              # auto-continue, re-pushed
+    batch = mgr._pop_due(24.0)
+    assert [(ch.engine, ch.at) for ch in batch] == [(a, 19.0), (b, 20.0)]
+    assert list(mgr.lag) == [0.0, 5.0, 4.0]
+    # A long gap fires every phase that was missed, each chained from its deadline
+    batch = mgr._pop_due(40.0)
+    assert [(ch.engine, ch.at) for ch in batch] == [(b, 25.0), (a, 29.0), (a, 34.0)]
+    assert (a.deadline, b.deadline) == (44.0, 45.0)
+
+
+def test_reset_orphans_heap_entry():
+    clock = FakeClock(0.0)
+    mgr = SessionManager(clock=clock)
+    eng = mgr.add(10, 5)
+    mgr.reset(eng.sid)
+    assert mgr._pop_due(100.0) == []
+    assert eng.phase == FOCUS and not eng.running
+    mgr.start(eng.sid, now=100.0)
+    assert [ch.at for ch in mgr._pop_due(110.0)] == [110.0]
+
+
+def test_run_wakes_for_an_earlier_deadline():
+    fired = []
+
+    async def main():
+        mgr = SessionManager(on_batch=lambda batch: fired.extend((ch.engine.sid, ch.ended) for ch in batch))
+        mgr.add(3600, 300)                 # the loop sleeps towards this one...
+        task = asyncio.create_task(mgr.run())
+        await asyncio.sleep(0.01)
+        t = time.monotonic()
+        short = mgr.add(0.05, 0.05, auto_continue=False)  # ...until this is pushed
+        while not fired and time.monotonic() - t < 2.0:
+            await asyncio.sleep(0.01)
+        mgr.stop()
+        await asyncio.wait_for(task, 1.0)
+        return short, time.monotonic() - t
+
+    short, secs = asyncio.run(main())
+    assert fired == [(short.sid, FOCUS)]
+    assert secs < 1.0
+
+
+def test_on_batch_errors_do_not_stop_the_loop(capsys):
+    calls = []
+
+    async def on_batch(batch):
+        calls.append(len(batch))
+        raise RuntimeError("boom")
+
+    async def main():
+        mgr = SessionManager(on_batch=on_batch)
+        mgr.add(0.02, 0.02)
+        task = asyncio.create_task(mgr.run())
+        t = time.monotonic()
+        while len(calls) < 2 and time.monotonic() - t < 2.0:
+            await asyncio.sleep(0.01)
+        mgr.stop()
+        await asyncio.wait_for(task, 1.0)
+
+    asyncio.run(main())
+    assert len(calls) >= 2
+    assert "[Engine] on_batch error: boom" in capsys.readouterr().out
@@ -0,0 +1,105 @@
+"""history_io: row validation, CSV/JSONL parsing and strict imports."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history_io  # noqa: E402
+from history_io import _Merger, import_history, read_history  # noqa: E402
+from storage import DataStore  # noqa: E402
+
+
+def _merge(*rows):
+    merger = _Merger()
+    merger.add_chunk([(i + 2, *row) for i, row in enumerate(rows)])
+    return merger
+
+
+def test_defaults_and_units():
+    m = _merge(("2024-01-02", "3", "75", None),       # per-day totals
+               ("2024-01-02T09:30:00", None, None, "1500"),   # one session, seconds
+               ("2024-01-03", "", "12.5", "999"),      # minutes win over seconds
+               ("2024-01-04", None, None, None))       # one session, no time
+    assert m.deltas == {"2024-01-02": [4, 100.0], "2024-01-03": [1, 12.5], "2024-01-04": [1, 0.0]}
+    assert (m.rows, m.bad, m.errors) == (4, 0, [])
+
+
+@pytest.mark.parametrize("row, message", [
+    ((None, "1", "25", None), "missing date"),
+    (("", "1", "25", None), "missing date"),
+    (("2024-02-30", "1", "25", None), "day is out of range"),
+    (("yesterday", "1", "25", None), "Invalid isoformat"),
+    (("2024-01-02", "two", "25", None), "invalid literal"),
+    (("2024-01-02", "1.5", "25", None), "invalid literal"),
+    (("2024-01-02", "1", "abc", None), "could not convert"),
+    (("2024-01-02", "-1", "25", None), "negative value"),
+    (("2024-01-02", "1", None, "-60"), "negative value"),
+    (("2024-01-02", [1], "25", None), "int()"),
+])
+def test_invalid_rows_are_counted_not_merged(row, message):
+    m = _merge(("2024-01-01", "1", "25", None), row)
+    assert m.deltas == {"2024-01-01": [1, 25.0]}
+    assert (m.rows, m.bad) == (2, 1)
+    assert m.errors[0][0] == 3 and message in m.errors[0][1]
+
+
+def test_errors_kept_are_capped():
+    m = _merge(*[("bad", "1", "1", None)] * (history_io.MAX_ERRORS_KEPT + 5))
+    assert m.bad == history_io.MAX_ERRORS_KEPT + 5
+    assert len(m.errors) == history_io.MAX_ERRORS_KEPT
+
+
+def test_csv_columns_aliases_and_short_rows(tmp_path):
+    src = tmp_path / "other.csv"
+    src.write_text("\ufeffStart, Duration_Secs ,Focus_Sessions\n"   # BOM, odd case/spacing
+                   "2024-03-01T08:00:00,1500,1\n"
+                   "2024-03-01T09:00:00,1500\n"      # short row: sessions defaults to 1
+                   "2024-03-02,oops,1\n", encoding="utf-8")
+    m = read_history(str(src), chunk_rows=2)
+    assert m.deltas == {"2024-03-01": [2, 50.0]}
+    assert m.bad == 1 and m.errors[0][0] == 4
+
+
+def test_csv_without_a_date_column(tmp_path):
+    src = tmp_path / "other.csv"
+    src.write_text("when,minutes\n2024-03-01,25\n")
+    with pytest.raises(ValueError, match="CSV header needs one of"):
+        read_history(str(src))
+
+
+def test_jsonl_bad_lines(tmp_path):
+    src = tmp_path / "log.jsonl"
+    src.write_text('{"date": "2024-04-01", "sessions": 2, "minutes": 50}\n'
+                   "\n"
+                   "[1, 2]\n"
+                   "{not json\n"
+                   '{"day": "2024-04-01", "seconds": 600}\n')
+    m = read_history(str(src))
+    assert m.deltas == {"2024-04-01": [3, 60.0]}
+    assert [line for line, _ in m.errors] == [3, 4]
+    assert m.rows == 4   # blank lines are not rows
+
+
+def test_unknown_extension_needs_a_format(tmp_path):
+    src = tmp_path / "history.txt"
+    src.write_text("date\n2024-01-01\n")
+    with pytest.raises(ValueError, match="--format"):
+        read_history(str(src))
+    assert read_history(str(src), fmt="csv").deltas == {"2024-01-01": [1, 0.0]}
+
+
+def test_strict_import_writes_nothing(tmp_path):
+    path = str(tmp_path / "data.json")
+    src = tmp_path / "other.csv"
+    src.write_text("date,minutes\n2024-01-01,25\n2024-01-02,-5\n")
+    with pytest.raises(ValueError, match="1 invalid rows"):
+        import_history(str(src), path, db_path=None, strict=True)
+    store = DataStore(path)
+    store.load(compact=False)
+    assert store.all_days() == {}
+    rep = import_history(str(src), path, db_path=None)   # the lock was released
+    assert (rep["imported"], rep["bad"], rep["days"], rep["minutes"]) == (1, 1, 1, 25)
+    store.load(compact=False)
+    assert store.all_days() == {"2024-01-01": {"focus_sessions": 1, "minutes": 25}}
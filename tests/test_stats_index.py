@@ -0,0 +1,112 @@
+"""StatsIndex range totals, incremental adds, streaks and the heatmap matrix."""
+import datetime as dt
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("numpy")
+
+from stats_index import StatsIndex  # noqa: E402
+
+TODAY = dt.date(2026, 8, 20)  # a Thursday
+
+
+def _days(*entries):
+    return {day: {"focus_sessions": s, "minutes": m} for day, s, m in entries}
+
+
+def _brute_total(days, start, end):
+    s = m = 0
+    for day, rec in days.items():
+        if start.isoformat() <= day <= end.isoformat():
+            s += rec["focus_sessions"]
+            m += rec["minutes"]
+    return s, m
+
+
+def test_totals_match_brute_force():
+    days = _days(("2026-07-01", 2, 50), ("2026-07-02", 1, 25), ("2026-07-15", 4, 100),
+                 ("2026-08-19", 3, 75), ("2026-08-20", 1, 30))
+    idx = StatsIndex.from_days(days, TODAY)
+    first = dt.date(2026, 6, 1)
+    for a in range(0, 90, 7):
+        for b in range(a, 90, 5):
+            start, end = first + dt.timedelta(days=a), first + dt.timedelta(days=b)
+            assert idx.total(start, end) == _brute_total(days, start, end), (start, end)
+    assert idx.total(dt.date(2000, 1, 1), dt.date(2100, 1, 1)) == (11, 280)
+    assert idx.total(TODAY, dt.date(2026, 8, 1)) == (0, 0)   # empty (reversed) range
+    assert idx.day("2026-07-15") == (4, 100)
+    assert idx.day(dt.date(2026, 7, 16)) == (0, 0)
+
+
+def test_invalid_keys_are_ignored():
+    idx = StatsIndex.from_days({"2026-08-01": {"focus_sessions": 1, "minutes": 25},
+                                "not-a-date": {"focus_sessions": 9, "minutes": 9}}, TODAY)
+    assert idx.total(dt.date(2026, 1, 1), TODAY) == (1, 25)
+    assert idx.origin == dt.date(2026, 8, 1).toordinal()
+
+
+def test_empty_history_starts_today():
+    idx = StatsIndex.from_days({}, TODAY)
+    assert idx.origin == TODAY.toordinal()
+    assert idx.total(TODAY, TODAY) == (0, 0)
+    assert idx.best_day() is None
+    assert idx.longest_streak() == 0 and idx.current_streak(TODAY) == 0
+
+
+def test_add_keeps_running_totals():
+    idx = StatsIndex.from_days(_days(("2026-08-18", 1, 25)), TODAY)
+    idx.add(TODAY, 1, 25)
+    idx.add(TODAY, 1, 25)
+    assert idx.day(TODAY) == (2, 50)
+    later = TODAY + dt.timedelta(days=200)          # grows past the initial capacity
+    idx.add(later, 3, 90)
+    assert idx.total(TODAY, later) == (5, 140)
+    assert idx.total(TODAY + dt.timedelta(days=1), later - dt.timedelta(days=1)) == (0, 0)
+    idx.add("2025-01-01", 2, 40)                    # back-dated: the origin moves
+    assert idx.origin == dt.date(2025, 1, 1).toordinal()
+    assert idx.total(dt.date(2025, 1, 1), later) == (8, 205)
+    assert idx.day("2026-08-18") == (1, 25)
+
+
+def test_series_zero_fills_outside_the_index():
+    idx = StatsIndex.from_days(_days(("2026-08-19", 3, 75)), TODAY)
+    out = idx.series(dt.date(2026, 8, 17), dt.date(2026, 8, 22))
+    assert out.tolist() == [0, 0, 3, 0, 0, 0]
+    assert idx.series(TODAY, TODAY, field="minutes").tolist() == [0]
+
+
+def test_streaks():
+    days = _days(("2026-08-01", 1, 25), ("2026-08-02", 1, 25), ("2026-08-03", 1, 25),
+                 ("2026-08-04", 1, 25), ("2026-08-10", 1, 25),
+                 ("2026-08-18", 1, 25), ("2026-08-19", 2, 50))
+    idx = StatsIndex.from_days(days, TODAY)
+    assert idx.longest_streak() == 4
+    assert idx.current_streak(TODAY) == 2            # today has nothing yet: ends yesterday
+    idx.add(TODAY, 1, 25)
+    assert idx.current_streak(TODAY) == 3
+    assert idx.current_streak(TODAY + dt.timedelta(days=2)) == 0   # broken yesterday
+    assert idx.current_streak(dt.date(2026, 8, 4)) == 4
+    assert idx.current_streak(dt.date(2026, 8, 5)) == 4
+    assert idx.current_streak(dt.date(2026, 8, 6)) == 0
+
+
+def test_best_day_prefers_the_earliest_tie():
+    idx = StatsIndex.from_days(_days(("2026-08-01", 3, 75), ("2026-08-05", 5, 100),
+                                     ("2026-08-09", 5, 125)), TODAY)
+    assert idx.best_day() == (dt.date(2026, 8, 5), 5)
+
+
+def test_heat_matrix_covers_the_window_only():
+    days = _days(("2026-05-01", 7, 1), ("2026-05-22", 1, 25), ("2026-08-17", 2, 50), ("2026-08-20", 4, 100))
+    idx = StatsIndex.from_days(days, TODAY)
+    m = idx.heat_matrix(TODAY, 90)
+    start = TODAY - dt.timedelta(days=89)           # 2026-05-23, a Saturday
+    weeks = (TODAY - (start - dt.timedelta(days=start.weekday()))).days // 7 + 1
+    assert m.shape == (7, weeks)
+    assert m.sum() == 6                             # May 1 and May 22 are before the window
+    assert m[0, -1] == 2 and m[3, -1] == 4          # Monday and Thursday of this week
+    assert m[4:, -1].tolist() == [0, 0, 0]          # after today
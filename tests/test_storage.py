@@ -0,0 +1,160 @@
+"""DataStore: journal replay, torn records, month rollover and the writer lock."""
+import datetime as dt
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+from storage import DataStore  # noqa: E402
+
+
+class FakeDate(dt.date):
+    current = dt.date(2026, 8, 20)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    monkeypatch.setattr(storage, "dt", types.SimpleNamespace(date=FakeDate, timedelta=dt.timedelta))
+
+    def set_today(day):
+        FakeDate.current = day
+    set_today(dt.date(2026, 8, 20))
+    return set_today
+
+
+def _open(path, compact=True):
+    store = DataStore(path)
+    store.load(compact=compact)
+    return store
+
+
+def _crash(store):
+    """Drop the store as a killed process would: no compaction, lock released."""
+    store._journal.close()
+    store._lock_file.close()
+
+
+def test_journal_replay(tmp_path):
+    path = str(tmp_path / "data.json")
+    store = _open(path)
+    store.log_session("2026-08-01", 25)
+    store.log_session("2026-08-01", 25)
+    store.set_setting("playlist_url", "x")
+    # No close(): the snapshot was never written, everything lives in the journal
+    _crash(store)
+    again = _open(path, compact=False)
+    assert again.data["days"]["2026-08-01"] == {"focus_sessions": 2, "minutes": 50}
+    assert again.data["settings"]["playlist_url"] == "x"
+    assert not os.path.exists(path)  # compact=False never writes
+
+
+def test_replay_skips_records_in_snapshot(tmp_path):
+    path = str(tmp_path / "data.json")
+    store = _open(path)
+    store.log_session("2026-08-01", 25)
+    store.close()                      # folded into the snapshot
+    store = _open(path)
+    store.log_session("2026-08-02", 50)
+    _crash(store)
+    again = _open(path, compact=False)
+    assert again.data["days"]["2026-08-01"] == {"focus_sessions": 1, "minutes": 25}
+    assert again.data["days"]["2026-08-02"] == {"focus_sessions": 1, "minutes": 50}
+
+
+def test_torn_record(tmp_path):
+    path = str(tmp_path / "data.json")
+    store = _open(path)
+    store.log_session("2026-08-01", 25)
+    _crash(store)
+    with open(path + ".journal", "ab") as f:
+        f.write(b'{"op": "session", "date": "2026-08-0')   # crash mid-append
+    store = _open(path)
+    assert store.data["days"] == {"2026-08-01": {"focus_sessions": 1, "minutes": 25}}
+    store.log_session("2026-08-03", 25)   # must not be glued onto the torn line
+    _crash(store)
+    again = _open(path, compact=False)
+    assert again.data["days"]["2026-08-03"] == {"focus_sessions": 1, "minutes": 25}
+
+
+def test_month_rollover_without_new_records(tmp_path, clock):
+    path = str(tmp_path / "data.json")
+    store = _open(path)
+    expected = {}
+    for day in ("2025-12-30", "2026-06-15", "2026-08-01", "2026-08-20"):
+        store.log_session(day, 25)
+        expected[day] = {"focus_sessions": 1, "minutes": 25}
+    store.close()
+
+    # Relaunch on later months with nothing new logged in between
+    for today in (dt.date(2026, 10, 2), dt.date(2026, 11, 2), dt.date(2027, 1, 3)):
+        clock(today)
+        store = _open(path)
+        store.close()
+        reopened = _open(path, compact=False)
+        assert reopened.all_days() == expected, today
+        manifest = reopened.data["archives"]
+        for entry in manifest.values():
+            assert os.path.exists(reopened._archive_path(entry["file"]))
+        assert sorted(os.listdir(reopened.archive_dir)) == sorted(e["file"] for e in manifest.values())
+
+    assert set(manifest) == {"2025", "2026"}
+    assert reopened.data["days"] == {}
+    assert manifest["2026"]["aggregate"]["sessions"] == 3
+
+
+def test_rollover_keeps_archive_of_seq_named_snapshot(tmp_path, clock):
+    # Snapshots written before `archive_gen` named files by journal seq
+    path = str(tmp_path / "data.json")
+    store = _open(path)
+    store.log_session("2026-05-01", 25)
+    store.close()
+    clock(dt.date(2026, 9, 1))
+    store = _open(path)
+    store.close()
+    store = _open(path, compact=False)
+    store.data.pop("archive_gen")
+    storage.atomic_write_json(path, store.data)
+    store = _open(path)
+    store.log_session("2026-07-02", 25)
+    store.close()
+    clock(dt.date(2026, 10, 1))
+    store = _open(path)
+    store.close()
+    assert _open(path, compact=False).all_days() == {
+        "2026-05-01": {"focus_sessions": 1, "minutes": 25},
+        "2026-07-02": {"focus_sessions": 1, "minutes": 25},
+    }
+
+
+def test_import_while_app_holds_store(tmp_path):
+    import history_io
+    path = str(tmp_path / "data.json")
+    src = tmp_path / "other.csv"
+    src.write_text("date,sessions,minutes\n2026-08-02,3,75\n")
+
+    app = _open(path)                  # the running app
+    app.log_session("2026-08-01", 25)
+    with pytest.raises(storage.StoreLocked):
+        _open(path)
+    with pytest.raises(storage.StoreLocked):
+        history_io.import_history(str(src), path, db_path=None)
+    reader = _open(path, compact=False)  # read-only users (export, report) still work
+    assert reader.data["days"]["2026-08-01"] == {"focus_sessions": 1, "minutes": 25}
+    with pytest.raises(RuntimeError):
+        reader.log_session("2026-08-03", 25)
+    app.log_session("2026-08-01", 25)
+    app.close()
+
+    history_io.import_history(str(src), path, db_path=None)
+    assert _open(path, compact=False).all_days() == {
+        "2026-08-01": {"focus_sessions": 2, "minutes": 50},
+        "2026-08-02": {"focus_sessions": 3, "minutes": 75},
+    }